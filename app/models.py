@@ -62,9 +62,27 @@ class Menu(db.Model):
     vendor = db.relationship('Vendor', back_populates='menu_items')  # Vendor relationship
     orders = db.relationship('Order', back_populates='menu', cascade="all, delete-orphan")
 
+class OrderHeader(db.Model):
+    """One customer checkout; its items are the Order rows pointing at it."""
+    __tablename__ = 'OrderHeader'
+    OrderHeaderID = db.Column(db.Integer, primary_key=True)
+    VendorID = db.Column(db.Integer, db.ForeignKey('Vendor.VendorID', ondelete="CASCADE"), nullable=False)
+    CustomerID = db.Column(db.Integer, db.ForeignKey('Customer.CustomerID', ondelete="CASCADE"), nullable=False)
+    OrderDate = db.Column(db.DateTime, server_default=db.func.now())
+
+    lines = db.relationship('Order', back_populates='header')
+
+    __table_args__ = (
+        db.Index('ix_OrderHeader_VendorID_OrderDate', 'VendorID', 'OrderDate'),
+        db.Index('ix_OrderHeader_CustomerID_OrderDate', 'CustomerID', 'OrderDate'),
+    )
+
 class Order(db.Model):
+    """An order line: one menu item of an OrderHeader."""
     __tablename__ = 'Order'
     OrderID = db.Column(db.Integer, primary_key=True)
+    # NULL only for rows written before headers existed; `flask migrate-order-headers` fills it in
+    OrderHeaderID = db.Column(db.Integer, db.ForeignKey('OrderHeader.OrderHeaderID', ondelete="CASCADE"), index=True)
     VendorID = db.Column(db.Integer, db.ForeignKey('Vendor.VendorID', ondelete="CASCADE"), nullable=False)
     CustomerID = db.Column(db.Integer, db.ForeignKey('Customer.CustomerID', ondelete="CASCADE"), nullable=False)
     MenuID = db.Column(db.Integer, db.ForeignKey('Menu.MenuID', ondelete="CASCADE"), nullable=False)
@@ -75,3 +93,57 @@ class Order(db.Model):
 
     customer = db.relationship('Customer', back_populates='orders')
     menu = db.relationship('Menu', back_populates='orders')
+    header = db.relationship('OrderHeader', back_populates='lines')
+
+    __table_args__ = (
+        db.Index('ix_Order_VendorID_OrderDate', 'VendorID', 'OrderDate'),
+        db.Index('ix_Order_CustomerID_OrderDate', 'CustomerID', 'OrderDate'),
+    )
+
+class VendorRatingSummary(db.Model):
+    """Per-vendor rating aggregate kept in step with Ratings by rating_utils."""
+    __tablename__ = 'VendorRatingSummary'
+    VendorID = db.Column(db.Integer, db.ForeignKey('Vendor.VendorID', ondelete="CASCADE"), primary_key=True)
+    RatingCount = db.Column(db.Integer, nullable=False, default=0)
+    RatingSum = db.Column(db.Integer, nullable=False, default=0)
+    AvgRating = db.Column(db.Numeric(4, 2), index=True)  # NULL until the first rating
+
+class ChatMessage(db.Model):
+    __tablename__ = 'ChatMessage'
+    MessageID = db.Column(db.Integer, primary_key=True)
+    MessageUID = db.Column(db.String(32), unique=True, nullable=False)  # assigned when the message is published
+    Room = db.Column(db.String(64), nullable=False)
+    Username = db.Column(db.String(50))
+    Message = db.Column(db.Text, nullable=False)
+    SentAt = db.Column(db.Float, nullable=False)  # epoch seconds, as stamped by the sender's worker
+
+    __table_args__ = (db.Index('ix_ChatMessage_Room_SentAt', 'Room', 'SentAt'),)
+
+class Conversation(db.Model):
+    """The chat room of one vendor and customer, kept current by conversation_utils."""
+    __tablename__ = 'Conversation'
+    VendorID = db.Column(db.Integer, db.ForeignKey('Vendor.VendorID', ondelete="CASCADE"), primary_key=True)
+    CustomerID = db.Column(db.Integer, db.ForeignKey('Customer.CustomerID', ondelete="CASCADE"), primary_key=True)
+    LastActivityAt = db.Column(db.Float, nullable=False)  # epoch seconds of the latest order or message
+    VendorUnread = db.Column(db.Integer, nullable=False, default=0)  # messages from the customer
+    CustomerUnread = db.Column(db.Integer, nullable=False, default=0)  # messages from the vendor
+
+    __table_args__ = (
+        db.Index('ix_Conversation_VendorID_LastActivityAt', 'VendorID', 'LastActivityAt'),
+        db.Index('ix_Conversation_CustomerID_LastActivityAt', 'CustomerID', 'LastActivityAt'),
+    )
+
+class OrderEvent(db.Model):
+    """Outbox row for an order notification, written in the order's own transaction."""
+    __tablename__ = 'OrderEvent'
+    EventID = db.Column(db.Integer, primary_key=True)
+    Event = db.Column(db.String(32), nullable=False)  # Socket.IO event name
+    Room = db.Column(db.String(64), nullable=False)
+    Payload = db.Column(db.Text, nullable=False)  # JSON
+    CoalesceKey = db.Column(db.String(64))  # pending events with the same key collapse to the newest
+    Status = db.Column(db.Enum('Pending', 'Delivered', 'Superseded', 'Failed'), nullable=False, default='Pending')
+    Attempts = db.Column(db.Integer, nullable=False, default=0)
+    CreatedAt = db.Column(db.Float, nullable=False)
+    NextAttemptAt = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (db.Index('ix_OrderEvent_Status_NextAttemptAt', 'Status', 'NextAttemptAt'),)
@@ -0,0 +1,132 @@
+import contextvars
+import logging
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+ASYNC_MODES = ('threading', 'gevent')
+
+
+def is_cooperative():
+    """True once gevent has patched the standard library in this process."""
+    if 'gevent.monkey' not in sys.modules:
+        return False
+    from gevent import monkey
+    return monkey.is_module_patched('threading')
+
+
+def resolve_async_mode(config):
+    """SOCKETIO_ASYNC_MODE, or "threading" when gevent was asked for but never patched in (see run.py)."""
+    async_mode = config.get('SOCKETIO_ASYNC_MODE') or 'threading'
+    if async_mode not in ASYNC_MODES:
+        raise ValueError(f"Unknown SOCKETIO_ASYNC_MODE: {async_mode}")
+    if async_mode == 'gevent' and not is_cooperative():
+        logger.warning("SOCKETIO_ASYNC_MODE=gevent needs gevent's monkey patching before the app is imported "
+                       "(see run.py); using threading")
+        return 'threading'
+    return async_mode
+
+
+def native_executor(max_workers, thread_name_prefix):
+    """An executor whose workers are real OS threads even when threading is monkey patched.
+
+    Work that blocks in C code (bcrypt, mysqlclient, sqlite3) would stall every greenlet
+    on the hub; on a native thread it only stalls that thread, and waiting on its future
+    yields to the other greenlets.
+    """
+    if is_cooperative():
+        return _GeventNativeExecutor(max_workers)
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+
+
+class _GeventNativeExecutor:
+    """gevent's native thread pool; a caller that already is a native worker thread runs the job itself.
+
+    gevent only lets the hub's own thread hand work to its pool, and a request offloaded by
+    BlockingRequestOffload is on a native thread anyway, so blocking there is harmless.
+    """
+
+    def __init__(self, max_workers):
+        from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+        self._pool = NativeThreadPoolExecutor(max_workers=max_workers)
+
+    def submit(self, fn, *args, **kwargs):
+        from gevent.exceptions import InvalidThreadUseError
+        try:
+            return self._pool.submit(fn, *args, **kwargs)
+        except InvalidThreadUseError:
+            pass
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+        return future
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+class BlockingRequestOffload:
+    """WSGI middleware that runs HTTP requests on a native thread pool.
+
+    Socket.IO traffic is answered by the Socket.IO middleware wrapped around this one
+    and stays on greenlets; ordinary requests, whose views block in the database driver,
+    run on one of ``workers`` OS threads. Streamed bodies are pulled on the pool as well,
+    one chunk at a time, since each chunk may fetch another batch of rows; the chunks
+    share one contextvars context, so the request context a stream pushes is popped in
+    the same context whichever thread runs the last chunk.
+    """
+
+    def __init__(self, wsgi_app, workers):
+        self.wsgi_app = wsgi_app
+        self.workers = workers
+        self.executor = native_executor(workers, "db-worker")
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def _call(self, fn, *args):
+        with self._lock:
+            self.active += 1
+        try:
+            return self.executor.submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def __call__(self, environ, start_response):
+        body = self._call(self.wsgi_app, environ, start_response)
+        return _OffloadedBody(self, body)
+
+    def stats(self):
+        with self._lock:
+            return {"workers": self.workers, "active": self.active}
+
+
+class _OffloadedBody:
+    _DONE = object()
+
+    def __init__(self, offload, body):
+        self.offload = offload
+        self.body = body
+        self.context = contextvars.copy_context()
+
+    def __iter__(self):
+        iterator = iter(self.body)
+        while True:
+            chunk = self.offload._call(self.context.run, next, iterator, self._DONE)
+            if chunk is self._DONE:
+                return
+            yield chunk
+
+    def close(self):
+        close = getattr(self.body, "close", None)
+        if close is not None:
+            self.offload._call(self.context.run, close)
+
+
+def db_worker_count(config):
+    """DB_WORKER_THREADS, or the primary pool's pool_size + max_overflow so no worker waits on a connection."""
+    return config.get('DB_WORKER_THREADS') or config.get('DB_POOL_SIZE', 10) + config.get('DB_MAX_OVERFLOW', 10)
@@ -1,13 +1,16 @@
 from flask import Blueprint, request, jsonify, render_template
 from flask_login import login_user, logout_user, login_required, current_user
-from app import db, bcrypt, login_manager
+from app import db, login_manager
 from app.models import AuthUser, Customer, Vendor
+from app.routes.identity_utils import identity_cache
+from app.routes.password_utils import HasherBusy, password_hasher
 
 auth_bp = Blueprint('auth', __name__)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return AuthUser.query.get(int(user_id))
+    # One joined query (or none on a cache hit) for the user and its vendor/customer profile
+    return identity_cache.load(int(user_id))
 
 @auth_bp.route('/', methods=['GET'])
 def home():
@@ -34,8 +37,11 @@ def register():
     if AuthUser.query.filter((AuthUser.Username == username) | (AuthUser.Email == email)).first():
         return jsonify({"message": "Username or email already exists"}), 400
 
-    # Hash the password
-    password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+    # Hash the password on the bounded bcrypt pool
+    try:
+        password_hash = password_hasher.hash(password)
+    except HasherBusy:
+        return jsonify({"message": "Server busy, please retry."}), 429, {"Retry-After": "1"}
 
     # Create new user
     new_user = AuthUser(Username=username, Email=email, PasswordHash=password_hash, Role=role)
@@ -77,7 +83,19 @@ def login():
         AuthUser.Role == role  # Match the role
     ).first()
 
-    if user and bcrypt.check_password_hash(user.PasswordHash, password):
+    try:
+        valid = user is not None and password_hasher.check(user.PasswordHash, password)
+    except HasherBusy:
+        return jsonify({"message": "Server busy, please retry."}), 429, {"Retry-After": "1"}
+
+    if valid:
+        if password_hasher.needs_rehash(user.PasswordHash):
+            # Move the stored hash to the current BCRYPT_LOG_ROUNDS; a busy pool just defers it
+            try:
+                user.PasswordHash = password_hasher.hash(password)
+                db.session.commit()
+            except HasherBusy:
+                pass
         login_user(user)
         return jsonify({"message": f"{role} login successful"}), 200
 
@@ -0,0 +1,244 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CacheStats:
+    """Hit/miss/eviction counters shared by every cache backend."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def as_dict(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class MemoryCache:
+    """In-process LRU cache with a per-entry TTL and a bound on the number of entries."""
+
+    def __init__(self, max_entries=1024, ttl_seconds=300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.incr("misses")
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.stats.incr("expirations")
+                self.stats.incr("misses")
+                return None
+            self._entries.move_to_end(key)
+        self.stats.incr("hits")
+        return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl_seconds if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.incr("evictions")
+
+    def peek(self, key):
+        """Return a live entry without touching the LRU order or the counters."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def delete(self, key):
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries.keys())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteCache:
+    """On-disk cache shared by every worker process on the host.
+
+    Values must be JSON serialisable. Each thread keeps its own connection and the
+    database runs in WAL mode so readers never wait on a writer.
+    """
+
+    def __init__(self, path="cache.sqlite3", max_entries=1024, ttl_seconds=300):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        self._local = threading.local()
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._connection().execute("CREATE INDEX IF NOT EXISTS ix_cache_accessed_at ON cache (accessed_at)")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.stats.incr("misses")
+            return None
+        value, expires_at = row
+        if expires_at <= now:
+            conn.execute("DELETE FROM cache WHERE key = ? AND expires_at <= ?", (key, now))
+            self.stats.incr("expirations")
+            self.stats.incr("misses")
+            return None
+        conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        self.stats.incr("hits")
+        return json.loads(value)
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        expires_at = now + (self.ttl_seconds if ttl is None else ttl)
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(value), expires_at, now),
+        )
+        overflow = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            self.stats.incr("evictions", overflow)
+
+    def peek(self, key):
+        row = self._connection().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, key):
+        return self._connection().execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount > 0
+
+    def keys(self):
+        return [row[0] for row in self._connection().execute("SELECT key FROM cache")]
+
+    def clear(self):
+        self._connection().execute("DELETE FROM cache")
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class Cache:
+    """Cache facade used by the read endpoints; the backend is picked from app config.
+
+    CACHE_BACKEND is ``"memory"`` (default, per process) or ``"sqlite"`` (shared between
+    processes through CACHE_SQLITE_PATH). CACHE_DURATION_SECONDS is the default TTL and
+    CACHE_MAX_ENTRIES bounds the number of stored entries.
+    """
+
+    def __init__(self):
+        self.backend = MemoryCache()
+
+    def init_app(self, app):
+        backend = app.config.get("CACHE_BACKEND", "memory")
+        max_entries = app.config.get("CACHE_MAX_ENTRIES", 1024)
+        ttl_seconds = app.config.get("CACHE_DURATION_SECONDS", 300)
+        if backend == "sqlite":
+            path = app.config.get("CACHE_SQLITE_PATH") or os.path.join(app.instance_path, "cache.sqlite3")
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.backend = SQLiteCache(path, max_entries=max_entries, ttl_seconds=ttl_seconds)
+        elif backend == "memory":
+            self.backend = MemoryCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        else:
+            raise ValueError(f"Unknown CACHE_BACKEND: {backend}")
+        logger.info("Using %s cache (max_entries=%s, ttl=%ss)", backend, max_entries, ttl_seconds)
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, value, ttl)
+
+    def delete(self, key):
+        return self.backend.delete(key)
+
+    def peek(self, key):
+        return self.backend.peek(key)
+
+    def keys(self):
+        return self.backend.keys()
+
+    def delete_matching(self, prefix, predicate=None):
+        """Delete every entry under ``prefix`` whose value satisfies ``predicate``."""
+        deleted = 0
+        for key in self.backend.keys():
+            if not key.startswith(prefix):
+                continue
+            if predicate is not None:
+                value = self.backend.peek(key)
+                if value is None or not predicate(value):
+                    continue
+            deleted += self.backend.delete(key)
+        return deleted
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        stats = self.backend.stats.as_dict()
+        stats["entries"] = len(self.backend)
+        return stats
+
+
+cache = Cache()
@@ -1,30 +1,254 @@
-from flask import Blueprint, render_template, request, session
-from flask_socketio import emit
+import logging
+import threading
+import time
+from collections import defaultdict
+from uuid import uuid4
+from flask import Blueprint, render_template, request, session, jsonify
+from flask_login import current_user, login_required
+from flask_socketio import emit, join_room, leave_room
 from flask_socketio import SocketIO
+from app.routes.kafka_utils import TOPIC, BatchingProducer, ConsumerWorker, create_broker
+from app.routes.chat_history_utils import ChatHistoryWriter, RecentMessages, load_history
+from app.routes.conversation_utils import mark_read, parse_room, room_directory
+from app.routes.identity_utils import current_customer, current_vendor
+from app.routes.pagination_utils import PaginationError, encode_cursor, page_args, page_headers
+from app.routes.metrics_utils import SOCKETIO_EMITS
+
+logger = logging.getLogger(__name__)
 
 socketio = SocketIO(cors_allowed_origins="*")
 chat_bp = Blueprint('chat', __name__)
 
-users = {}
+LOBBY = "lobby"
+
+
+class ConnectionRegistry:
+    """Bidirectional sid <-> username map plus the chat rooms each sid has joined.
+
+    Sender lookup is a dict read instead of a scan over every connected user, and
+    disconnect() removes every trace of a socket.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = {}  # sid -> username
+        self._sids = defaultdict(set)  # username -> sids
+        self._rooms = defaultdict(list)  # sid -> joined rooms, most recent last
+
+    def connect(self, sid, username):
+        with self._lock:
+            previous = self._users.get(sid)
+            if previous is not None and previous != username:
+                self._sids[previous].discard(sid)
+            self._users[sid] = username
+            self._sids[username].add(sid)
+
+    def disconnect(self, sid):
+        with self._lock:
+            username = self._users.pop(sid, None)
+            self._rooms.pop(sid, None)
+            if username is not None:
+                self._sids[username].discard(sid)
+                if not self._sids[username]:
+                    del self._sids[username]
+            return username
+
+    def join(self, sid, room):
+        with self._lock:
+            rooms = self._rooms[sid]
+            if room in rooms:
+                rooms.remove(room)
+            rooms.append(room)
+
+    def leave(self, sid, room):
+        with self._lock:
+            if room in self._rooms.get(sid, ()):
+                self._rooms[sid].remove(room)
+
+    def username(self, sid):
+        return self._users.get(sid)
+
+    def sids(self, username):
+        return set(self._sids.get(username, ()))
+
+    def rooms(self, sid):
+        return list(self._rooms.get(sid, ()))
+
+    def __len__(self):
+        return len(self._users)
+
+
+registry = ConnectionRegistry()
+
+
+def can_join(room):
+    """The lobby is open to everyone; room_{VendorID}_{CustomerID} only to that vendor or customer."""
+    if room == LOBBY:
+        return True
+    pair = parse_room(room)
+    if pair is None or not current_user.is_authenticated:
+        return False
+    vendor_id, customer_id = pair
+    if current_user.Role == "Vendor":
+        return current_user.vendor is not None and current_user.vendor.VendorID == vendor_id
+    return current_user.customer is not None and current_user.customer.CustomerID == customer_id
+
+
+class ChatPipeline:
+    """Chat messages go producer -> broker -> consumer worker -> Socket.IO.
+
+    Handlers only enqueue into the batching producer; the consumer worker (started on
+    the first message) does the actual emits, so delivery never runs on the request path.
+    """
+
+    def __init__(self):
+        self.broker = None
+        self.producer = None
+        self.worker = None
+
+    def init_app(self, app):
+        topic = app.config.get('CHAT_TOPIC', TOPIC)
+        self.broker = create_broker(app.config)
+        self.producer = BatchingProducer(
+            self.broker,
+            topic=topic,
+            batch_size=app.config.get('CHAT_BATCH_SIZE', 100),
+            linger_ms=app.config.get('CHAT_LINGER_MS', 5),
+            max_queue=app.config.get('CHAT_MAX_QUEUE', 10000)
+        )
+        self.worker = ConsumerWorker(self.broker, deliver_chat_message, topic=topic,
+                                     start_task=socketio.start_background_task)
+        history_writer.init_app(app)
+        recent_messages.per_room = app.config.get('CHAT_HISTORY_BUFFER', 200)
+
+    def publish(self, message):
+        self.worker.start()
+        if not self.producer.publish(message):
+            return False
+        # Only the publishing worker persists a message; every worker buffers what it delivers
+        history_writer.add(message)
+        return True
+
+
+chat_pipeline = ChatPipeline()
+history_writer = ChatHistoryWriter()
+recent_messages = RecentMessages()
+
+
+def deliver_chat_message(message):
+    """Fan a consumed message out to the sockets in its room.
+
+    When every worker consumes every message (Kafka) each one only emits to its own
+    sockets; otherwise the emit goes through the Socket.IO message queue, if any.
+    """
+    recent_messages.append(message)
+    socketio.emit("chat", {"message": message["message"], "username": message["username"]},
+                  to=message["room"], ignore_queue=chat_pipeline.broker.fanout)
+    SOCKETIO_EMITS.inc("chat")
 
 @socketio.on("connect")
 def handle_connect():
-    print("Client connected!")
+    logger.debug("socket connected sid=%s", request.sid)
+
+@socketio.on("disconnect")
+def handle_disconnect(*args):
+    username = registry.disconnect(request.sid)
+    logger.debug("socket disconnected sid=%s user=%s", request.sid, username)
+
+def _join(room):
+    if not can_join(room):
+        emit("error", {"error": f"Cannot join {room}."})
+        return False
+    join_room(room)
+    registry.join(request.sid, room)
+    return True
 
 @socketio.on("user_join")
-def handle_user_join(username):
-    #username = data.get("username")
-    print(f"User {username} joined!")
-    users[username] = request.sid
+def handle_user_join(data):
+    """Register the sender; accepts a username or {"username", "room"} (defaults to the lobby)."""
+    if isinstance(data, dict):
+        username, room = data.get("username"), data.get("room") or LOBBY
+    else:
+        username, room = data, LOBBY
+    logger.debug("socket user_join sid=%s user=%s room=%s", request.sid, username, room)
+    registry.connect(request.sid, username)
+    _join(room)
+
+@socketio.on("join_room")
+def handle_join_room(data):
+    _join(data.get("room"))
+
+@socketio.on("leave_room")
+def handle_leave_room(data):
+    room = data.get("room")
+    leave_room(room)
+    registry.leave(request.sid, room)
 
 @socketio.on("new_message")
-def handle_new_message(message):
-    print(f"New message: {message}")
-    username = None 
-    for user in users:
-        if users[user] == request.sid:
-            username = user
-    emit("chat", {"message": message, "username": username}, broadcast=True)
+def handle_new_message(data):
+    """Publish to one room: {"room", "message"} or a bare message for the sender's latest room."""
+    username = registry.username(request.sid)
+    rooms = registry.rooms(request.sid)
+    if isinstance(data, dict):
+        message, room = data.get("message"), data.get("room") or (rooms[-1] if rooms else None)
+    else:
+        message, room = data, rooms[-1] if rooms else None
+    if room is None or room not in rooms:
+        emit("error", {"error": "Join a room before sending messages."})
+        return
+    # The sender's role decides whose unread count the message raises (see conversation_utils)
+    role = current_user.Role if current_user.is_authenticated else None
+    chat_pipeline.publish({"uid": uuid4().hex, "message": message, "username": username, "room": room,
+                           "role": role, "sent_at": time.time()})
+
+@chat_bp.route("/chat/<room>/history", methods=["GET"])
+@login_required
+def get_chat_history(room):
+    """Page backwards through a room's messages; each page is returned oldest first."""
+    if room == LOBBY or not can_join(room):
+        return jsonify({"error": "Access denied."}), 403
+    try:
+        limit, cursor = page_args()
+        if cursor is not None:
+            if len(cursor) != 2 or not isinstance(cursor[0], (int, float)) or not isinstance(cursor[1], str):
+                raise PaginationError("Invalid cursor.")
+            cursor = (cursor[0], cursor[1])
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    messages = load_history(room, recent_messages, history_writer, limit + 1, cursor)
+    next_cursor = None
+    if len(messages) > limit:
+        messages = messages[1:]
+        next_cursor = encode_cursor([messages[0]["sent_at"], messages[0]["uid"]])
+    return jsonify({"room": room, "messages": messages}), 200, page_headers(next_cursor)
+
+@chat_bp.route("/chat/rooms", methods=["GET"])
+@login_required
+def get_chat_rooms():
+    """List the caller's conversation rooms, latest activity first, with unread counts.
+
+    Vendors get one room per customer and customers one per vendor, for every pair
+    that has an order or a message.
+    """
+    vendor, customer = current_vendor(), current_customer()
+    if current_user.Role == "Vendor" and vendor is not None:
+        conversations = room_directory.for_vendor(vendor.VendorID)
+    elif current_user.Role == "Customer" and customer is not None:
+        conversations = room_directory.for_customer(customer.CustomerID)
+    else:
+        return jsonify({"error": "Profile not found."}), 404
+    return jsonify({"rooms": [entry["room"] for entry in conversations], "conversations": conversations}), 200
+
+@chat_bp.route("/chat/<room>/read", methods=["POST"])
+@login_required
+def mark_room_read(room):
+    """Clear the caller's unread count for a conversation room."""
+    pair = parse_room(room)
+    if pair is None or not can_join(room):
+        return jsonify({"error": "Access denied."}), 403
+    mark_read(*pair, current_user.Role)
+    return jsonify({"room": room, "Unread": 0}), 200
 
 @chat_bp.route("/chat")
 def chat():
@@ -0,0 +1,148 @@
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from sqlalchemy import insert
+from app import db
+from app.models import ChatMessage
+from app.routes.conversation_utils import record_messages, room_directory
+
+logger = logging.getLogger(__name__)
+
+
+def _key(message):
+    return message["sent_at"], message["uid"]
+
+
+def _as_dict(row):
+    return {"uid": row.MessageUID, "room": row.Room, "username": row.Username,
+            "message": row.Message, "sent_at": row.SentAt}
+
+
+class RecentMessages:
+    """Per-room ring buffer of the latest messages, filled as the consumer delivers them."""
+
+    def __init__(self, per_room=200):
+        self.per_room = per_room
+        self._rooms = defaultdict(lambda: deque(maxlen=self.per_room))
+        self._lock = threading.Lock()
+
+    def append(self, message):
+        with self._lock:
+            self._rooms[message["room"]].append(message)
+
+    def before(self, room, cursor=None):
+        """Buffered messages of ``room`` older than ``cursor``, oldest first."""
+        with self._lock:
+            messages = list(self._rooms.get(room, ()))
+        if cursor is not None:
+            messages = [message for message in messages if _key(message) < cursor]
+        return sorted(messages, key=_key)
+
+
+class ChatHistoryWriter:
+    """Write-behind buffer that persists chat messages with bulk inserts.
+
+    add() only appends to an in-memory list. The buffer is flushed in one INSERT
+    when it reaches ``flush_size`` messages or every ``flush_interval`` seconds,
+    whichever comes first. Rows from a failed flush are put back (up to
+    ``max_pending``) and retried on the next one.
+    """
+
+    def __init__(self, flush_size=200, flush_interval=1.0, max_pending=50000):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.app = None
+        self.written = 0
+        self.dropped = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        self.app = app
+        self.flush_size = app.config.get('CHAT_FLUSH_SIZE', self.flush_size)
+        self.flush_interval = app.config.get('CHAT_FLUSH_INTERVAL_SECONDS', self.flush_interval)
+
+    def add(self, message):
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending.append(message)
+            full = len(self._pending) >= self.flush_size
+        self._ensure_started()
+        if full:
+            self._wakeup.set()
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="chat-history-writer", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+        rows = [{"MessageUID": m["uid"], "Room": m["room"], "Username": m["username"],
+                 "Message": m["message"], "SentAt": m["sent_at"]} for m in batch]
+        try:
+            with self.app.app_context():
+                db.session.execute(insert(ChatMessage), rows)
+                # Last activity and unread counts move in the same transaction as the messages
+                touched = record_messages(batch)
+                db.session.commit()
+        except Exception:
+            logger.exception("Failed to persist %s chat message(s); will retry", len(rows))
+            with self._lock:
+                room = self.max_pending - len(self._pending)
+                self._pending[:0] = batch[:max(room, 0)]
+                self.dropped += max(len(batch) - room, 0)
+            return 0
+        for vendor_id, customer_id in touched:
+            room_directory.forget(vendor_id, customer_id)
+        self.written += len(rows)
+        return len(rows)
+
+    def pending(self, room):
+        with self._lock:
+            return [message for message in self._pending if message["room"] == room]
+
+
+def load_history(room, recent, writer, limit, cursor=None):
+    """Return up to ``limit`` messages of ``room`` older than ``cursor``, oldest first.
+
+    The ring buffer answers the page when it holds enough messages; otherwise the rest
+    comes from the ChatMessage table (plus anything still waiting in the write buffer).
+    """
+    buffered = recent.before(room, cursor)
+    if len(buffered) >= limit:
+        return buffered[-limit:]
+
+    boundary = _key(buffered[0]) if buffered else cursor
+    query = ChatMessage.query.filter(ChatMessage.Room == room)
+    if boundary is not None:
+        sent_at, uid = boundary
+        query = query.filter(db.or_(
+            ChatMessage.SentAt < sent_at,
+            db.and_(ChatMessage.SentAt == sent_at, ChatMessage.MessageUID < uid)
+        ))
+    rows = query.order_by(ChatMessage.SentAt.desc(), ChatMessage.MessageUID.desc()).limit(limit).all()
+    merged = {message["uid"]: message for message in map(_as_dict, rows)}
+    for message in writer.pending(room) + buffered:
+        if cursor is None or _key(message) < cursor:
+            merged[message["uid"]] = message
+    return sorted(merged.values(), key=_key)[-limit:]
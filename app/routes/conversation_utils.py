@@ -0,0 +1,180 @@
+import logging
+import re
+from collections import defaultdict
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import ChatMessage, Conversation, Customer, Order, Vendor
+from app.routes.cache_utils import MemoryCache
+
+logger = logging.getLogger(__name__)
+
+ROOM_PATTERN = re.compile(r"^room_(\d+)_(\d+)$")
+
+
+def room_name(vendor_id, customer_id):
+    return f"room_{vendor_id}_{customer_id}"
+
+
+def parse_room(room):
+    """``(VendorID, CustomerID)`` of a conversation room, or None for the lobby and anything else."""
+    match = ROOM_PATTERN.match(room or "")
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def _touch(vendor_id, customer_id, at, vendor_unread=0, customer_unread=0):
+    """Upsert one Conversation row in the current transaction."""
+    changes = {
+        Conversation.LastActivityAt: db.case((Conversation.LastActivityAt < at, at),
+                                             else_=Conversation.LastActivityAt),
+        Conversation.VendorUnread: Conversation.VendorUnread + vendor_unread,
+        Conversation.CustomerUnread: Conversation.CustomerUnread + customer_unread,
+    }
+    query = Conversation.query.filter_by(VendorID=vendor_id, CustomerID=customer_id)
+    if query.update(changes, synchronize_session=False):
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(Conversation(VendorID=vendor_id, CustomerID=customer_id, LastActivityAt=at,
+                                        VendorUnread=vendor_unread, CustomerUnread=customer_unread))
+    except IntegrityError:
+        # Another worker created it in the meantime
+        query.update(changes, synchronize_session=False)
+
+
+def record_order(vendor_id, customer_id, at):
+    """Open (or bump) the conversation for an order; commits with the caller's transaction."""
+    _touch(vendor_id, customer_id, at)
+
+
+def record_messages(messages):
+    """Apply a batch of chat messages to their conversations and return the ``(VendorID, CustomerID)`` pairs touched.
+
+    Each message counts as unread for the other party: ``role`` is the sender's AuthUser.Role.
+    """
+    deltas = defaultdict(lambda: [0.0, 0, 0])
+    for message in messages:
+        pair = parse_room(message["room"])
+        if pair is None:
+            continue
+        delta = deltas[pair]
+        delta[0] = max(delta[0], message["sent_at"])
+        if message.get("role") == "Vendor":
+            delta[2] += 1
+        elif message.get("role") == "Customer":
+            delta[1] += 1
+    for (vendor_id, customer_id), (at, vendor_unread, customer_unread) in deltas.items():
+        _touch(vendor_id, customer_id, at, vendor_unread, customer_unread)
+    return list(deltas)
+
+
+def mark_read(vendor_id, customer_id, role):
+    """Clear the unread count of the vendor or customer side of a conversation."""
+    column = Conversation.VendorUnread if role == "Vendor" else Conversation.CustomerUnread
+    Conversation.query.filter_by(VendorID=vendor_id, CustomerID=customer_id).update(
+        {column: 0}, synchronize_session=False)
+    db.session.commit()
+    room_directory.forget(vendor_id, customer_id)
+
+
+class RoomDirectory:
+    """Per-user list of chat rooms, newest activity first, read from the Conversation table.
+
+    Cached per vendor/customer; entries are dropped when this process records an order,
+    message batch or read receipt for the conversation, and expire after a short TTL so
+    other workers catch up.
+    """
+
+    def __init__(self):
+        self._entries = MemoryCache(max_entries=10000, ttl_seconds=30)
+
+    def init_app(self, app):
+        self._entries = MemoryCache(max_entries=app.config.get('ROOM_DIRECTORY_MAX_ENTRIES', 10000),
+                                    ttl_seconds=app.config.get('ROOM_DIRECTORY_TTL_SECONDS', 30))
+
+    def for_vendor(self, vendor_id):
+        key = ("Vendor", vendor_id)
+        rooms = self._entries.get(key)
+        if rooms is None:
+            rows = (
+                db.session.query(Conversation.CustomerID, Customer.CustomerName,
+                                 Conversation.LastActivityAt, Conversation.VendorUnread)
+                .join(Customer, Customer.CustomerID == Conversation.CustomerID)
+                .filter(Conversation.VendorID == vendor_id)
+                .order_by(Conversation.LastActivityAt.desc())
+                .all()
+            )
+            rooms = [{"room": room_name(vendor_id, customer_id), "CustomerID": customer_id, "CustomerName": name,
+                      "LastActivityAt": last_activity, "Unread": unread}
+                     for customer_id, name, last_activity, unread in rows]
+            self._entries.set(key, rooms)
+        return rooms
+
+    def for_customer(self, customer_id):
+        key = ("Customer", customer_id)
+        rooms = self._entries.get(key)
+        if rooms is None:
+            rows = (
+                db.session.query(Conversation.VendorID, Vendor.VendorName,
+                                 Conversation.LastActivityAt, Conversation.CustomerUnread)
+                .join(Vendor, Vendor.VendorID == Conversation.VendorID)
+                .filter(Conversation.CustomerID == customer_id)
+                .order_by(Conversation.LastActivityAt.desc())
+                .all()
+            )
+            rooms = [{"room": room_name(vendor_id, customer_id), "VendorID": vendor_id, "VendorName": name,
+                      "LastActivityAt": last_activity, "Unread": unread}
+                     for vendor_id, name, last_activity, unread in rows]
+            self._entries.set(key, rooms)
+        return rooms
+
+    def forget(self, vendor_id, customer_id):
+        self._entries.delete(("Vendor", vendor_id))
+        self._entries.delete(("Customer", customer_id))
+
+    def stats(self):
+        return self._entries.stats.as_dict()
+
+
+room_directory = RoomDirectory()
+
+
+def rebuild_conversations():
+    """Backfill Conversation from the distinct (VendorID, CustomerID) pairs of Order and ChatMessage.
+
+    Existing rows keep their unread counts; only missing rooms are added and
+    LastActivityAt is moved forward where the history is newer.
+    """
+    Conversation.__table__.create(db.engine, checkfirst=True)
+    latest = {}
+    for vendor_id, customer_id, order_date in (
+        db.session.query(Order.VendorID, Order.CustomerID, db.func.max(Order.OrderDate))
+        .group_by(Order.VendorID, Order.CustomerID)
+    ):
+        latest[(vendor_id, customer_id)] = order_date.timestamp() if order_date else 0.0
+    for room, sent_at in db.session.query(ChatMessage.Room, db.func.max(ChatMessage.SentAt)).group_by(ChatMessage.Room):
+        pair = parse_room(room)
+        if pair is not None:
+            latest[pair] = max(latest.get(pair, 0.0), sent_at)
+    # Rooms named after deleted vendors or customers have nothing to point at
+    vendors = {row[0] for row in db.session.query(Vendor.VendorID)}
+    customers = {row[0] for row in db.session.query(Customer.CustomerID)}
+    count = 0
+    for (vendor_id, customer_id), at in latest.items():
+        if vendor_id in vendors and customer_id in customers:
+            _touch(vendor_id, customer_id, at)
+            count += 1
+    db.session.commit()
+    logger.info("Rebuilt %s conversation(s)", count)
+    return count
+
+
+@click.command("rebuild-conversations")
+@with_appcontext
+def rebuild_conversations_command():
+    """Fill the Conversation table from existing orders and chat history."""
+    count = rebuild_conversations()
+    click.echo(f"Rebuilt {count} conversation(s).")
@@ -1,12 +1,22 @@
 import random
-from flask import Blueprint, redirect, render_template, request, jsonify, url_for
+from flask import Blueprint, current_app, redirect, render_template, request, jsonify, url_for
 from flask_login import login_required, current_user, logout_user
-from app import db, socketio
-from app.models import Customer, Order, Vendor, Ratings, Menu
-import shelve
-from datetime import datetime, timedelta
+from app import db
+from app.models import Customer, Order, OrderHeader, Vendor, Ratings, Menu, VendorRatingSummary
 import time
+from sqlalchemy import insert
+from sqlalchemy.orm import load_only
 from app.routes.retry_utils import retry_on_failure
+from app.routes.cache_utils import cache
+from app.routes.query_utils import (VENDOR_COLUMNS, VENDOR_FIELDS, iter_order_groups, iter_orders, parse_order_cursor,
+                                    load_vendor_summaries, query_order_group_page, query_order_page)
+from app.routes.pagination_utils import PaginationError, decode_cursor, encode_cursor, field_args, page_args, page_headers
+from app.routes.stream_utils import stream_batch_size, stream_json, streaming_requested
+from app.routes.invalidation_utils import bus
+from app.routes.identity_utils import current_customer
+from app.routes.outbox_utils import record_event
+from app.routes.conversation_utils import record_order, room_directory
+from app.routes.search_utils import search_vendors
 from tenacity import after_log, retry, stop_after_attempt, wait_fixed
 import logging
 
@@ -18,114 +28,174 @@ def query_vendors_with_logging():
 
 customer_bp = Blueprint('customer', __name__)
 
-CACHE_DURATION_SECONDS = 300  # Cache duration
+CUSTOMER_ORDER_FIELDS = ("OrderID", "MenuItem", "Quantity", "TotalPrice", "OrderStatus", "OrderDate")
+CUSTOMER_ORDER_GROUP_FIELDS = ("OrderHeaderID", "OrderDate", "OrderStatus", "ItemCount", "Quantity", "TotalPrice", "Items")
+
+def uses_search_index(location=None, vendor_name=None, food_item=None):
+    return current_app.config.get('SEARCH_BACKEND', 'index') == 'index' and bool(location or vendor_name or food_item)
 
 @retry_on_failure()
-def query_vendors(location=None, min_rating=None, vendor_name=None):
-    print("query_vendors called")
+def query_vendors(location=None, min_rating=None, vendor_name=None, food_item=None,
+                  limit=None, cursor=None, columns=None):
+    """Return ``(vendors, next_cursor)`` for one page of matching vendors.
+
+    Index searches page through the ranked matches with a ``[score, VendorID]`` cursor,
+    everything else is ordered by VendorID with a ``[VendorID]`` cursor. ``columns``
+    restricts the Vendor columns that are loaded.
+    """
     #Simulate DB failure
     # if random.randint(1, 3) != 3:  # Fail 2 out of 3 times
     #     raise Exception("Simulated database failure")
     query = Vendor.query
+    if columns:
+        query = query.options(load_only(*[getattr(Vendor, name) for name in columns]))
+
+    if uses_search_index(location, vendor_name, food_item):
+        # Trigram index lookup; results come back best match first
+        ranked = search_vendors(location=location, vendor_name=vendor_name, food_item=food_item)
+        if min_rating and ranked:
+            qualified = {row[0] for row in db.session.query(VendorRatingSummary.VendorID).filter(
+                VendorRatingSummary.VendorID.in_([vendor_id for vendor_id, _ in ranked]),
+                VendorRatingSummary.AvgRating >= float(min_rating))}
+            ranked = [(vendor_id, score) for vendor_id, score in ranked if vendor_id in qualified]
+        if cursor:
+            after = (-cursor[0], cursor[1])
+            ranked = [(vendor_id, score) for vendor_id, score in ranked if (-score, vendor_id) > after]
+        page = ranked[:limit] if limit else ranked
+        if not page:
+            return [], None
+        scores = dict(page)
+        vendors = query.filter(Vendor.VendorID.in_(scores)).all()
+        vendors.sort(key=lambda vendor: (-scores[vendor.VendorID], vendor.VendorID))
+        has_more = limit is not None and len(ranked) > limit
+        return vendors, encode_cursor(list(page[-1])[::-1]) if has_more else None
+
     if location:
         query = query.filter(Vendor.Location.ilike(f"%{location}%"))
-    if min_rating:
-        query = query.join(Ratings).group_by(Vendor.VendorID).having(db.func.avg(Ratings.Stars) >= float(min_rating))
     if vendor_name:
         query = query.filter(Vendor.VendorName.ilike(f"%{vendor_name}%"))
-    return query.all()
+    if food_item:
+        query = query.filter(Vendor.VendorID.in_(
+            db.session.query(Menu.VendorID).filter(Menu.FoodItem.ilike(f"%{food_item}%"))))
+    if min_rating:
+        query = query.join(VendorRatingSummary, VendorRatingSummary.VendorID == Vendor.VendorID).filter(
+            VendorRatingSummary.AvgRating >= float(min_rating))
+    if cursor:
+        query = query.filter(Vendor.VendorID > cursor[0])
+    query = query.order_by(Vendor.VendorID)
+    if limit is None:
+        return query.all(), None
+    vendors = query.limit(limit + 1).all()
+    if len(vendors) > limit:
+        return vendors[:limit], encode_cursor([vendors[limit - 1].VendorID])
+    return vendors, None
 
 @customer_bp.route('/vendors', methods=['GET'])
 @login_required
 def list_vendors():
-    """Retrieve a list of vendors with their ratings and reviews."""
+    """Retrieve a page of vendors with their ratings and reviews.
+
+    ``limit``/``cursor`` page through the results (the next cursor is returned in the
+    X-Next-Cursor and Link headers) and ``fields`` selects the keys of each vendor.
+    ``stream=1`` or ``format=ndjson`` streams every match instead of one page.
+    """
     location = request.args.get('location')
     min_rating = request.args.get('min_rating')
     vendor_name = request.args.get('vendor_name')
+    food_item = request.args.get('food_item')
+    try:
+        limit, cursor = page_args()
+        fields = field_args(VENDOR_FIELDS)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+    if cursor is not None and (len(cursor) != (2 if uses_search_index(location, vendor_name, food_item) else 1)
+                               or not all(isinstance(value, (int, float)) for value in cursor)):
+        return jsonify({"error": "Invalid cursor."}), 400
+
+    if streaming_requested():
+        # Streamed listings bypass the cache; vendors are loaded and summarised a batch at a time
+        vendors = iter_vendor_summaries(location, min_rating, vendor_name, food_item, cursor, fields)
+        return stream_json(vendors)
 
     cache_key = f"vendors_{location or 'all'}_{min_rating or 'all'}_{vendor_name or 'all'}"
-    current_time = datetime.now()
-
-    start_time = time.time()
-
-    with shelve.open("vendor_cache.db") as cache:
-        # Check if cached data exists and is still valid
-        if cache_key in cache:
-            cached_data = cache[cache_key]
-            if datetime.fromisoformat(cached_data["timestamp"]) > current_time - timedelta(seconds=CACHE_DURATION_SECONDS):
-                print("Cache hit for:", cache_key)
-                execution_time = time.time() - start_time
-                print("from cache: ", execution_time)
-                return cached_data["data"]
-
-        # Cache miss or expired cache
-        print("Cache miss for:", cache_key)
-
-        try:
-            vendors = query_vendors(location=location, min_rating=min_rating, vendor_name=vendor_name)
-            print("query_vendors called successfully")  # Log success
-        except Exception as e:
-            print(f"Error during query_vendors: {str(e)}")  # Log any retry-related errors
-            return jsonify({"error": "Failed to fetch vendors after retries."}), 500
-
-        result = []
-        for vendor in vendors:
-            avg_rating = db.session.query(db.func.avg(Ratings.Stars)).filter(Ratings.VendorID == vendor.VendorID).scalar()
-            avg_rating = round(avg_rating, 2) if avg_rating else None
-
-            reviews = Ratings.query.filter_by(VendorID=vendor.VendorID).all()
-            reviews_list = [
-                {
-                    "CustomerName": r.customer.CustomerName,
-                    "Stars": r.Stars,
-                    "Description": r.Description
-                }
-                for r in reviews
-            ]
-
-            menu_items = Menu.query.filter_by(VendorID=vendor.VendorID).all()
-            menu_list = [{"MenuID": m.MenuID, "FoodItem": m.FoodItem, "Price": str(m.Price)} for m in menu_items]
-
-            result.append({
-                "VendorID": vendor.VendorID,
-                "VendorName": vendor.VendorName,
-                "Location": vendor.Location,
-                "Phone": vendor.Phone,
-                "Email": vendor.Email,
-                "Address": vendor.Address,
-                "avg_rating": avg_rating,
-                "Reviews": reviews_list,
-                "Menu": menu_list
-            })
-        response_data = jsonify(result).get_data(as_text=True)
-
-            # Store the response in the cache
-        cache[cache_key] = {
-            "timestamp": current_time.isoformat(),
-            "data": response_data
-        }
-        execution_time = time.time() - start_time
-        print("from database: ", execution_time)
-        return response_data, 200
-
-@customer_bp.route("/chat/rooms", methods=["GET"])
-@login_required
-def get_customer_chat_rooms():
-    """Fetch chat rooms for the logged-in customer."""
-    if current_user.Role != "Customer":
-        return jsonify({"error": "Access denied. Only customers can access this."}), 403
-
-    # Fetch customer details
-    customer = Customer.query.filter_by(UserID=current_user.UserID).first()
-    if not customer:
-        return jsonify({"error": "Customer not found."}), 404
-
-    # Fetch orders and create chat rooms based on vendor IDs
-    orders = Order.query.filter_by(CustomerID=customer.CustomerID).all()
-    rooms = [f"room_{order.VendorID}_{customer.CustomerID}" for order in orders]
-
-    return jsonify({"rooms": rooms}), 200
-
+    if food_item:
+        cache_key += f"_{food_item}"
+    if request.args.get('cursor') or request.args.get('limit') or request.args.get('fields'):
+        cache_key += f"_{request.args.get('cursor') or 'first'}_{limit}_{','.join(fields)}"
+
+    start_time = time.perf_counter()
+
+    # Entries older than CACHE_DURATION_SECONDS are dropped by the cache itself
+    cached_data = cache.get(cache_key)
+    if cached_data is not None:
+        logger.debug("vendor listing source=cache key=%s elapsed_ms=%.2f",
+                     cache_key, (time.perf_counter() - start_time) * 1000)
+        return cached_data["data"], 200, page_headers(cached_data.get("next_cursor"))
+
+    columns = [name for name in fields if name in VENDOR_COLUMNS]
+    try:
+        vendors, next_cursor = query_vendors(location=location, min_rating=min_rating, vendor_name=vendor_name,
+                                             food_item=food_item, limit=limit, cursor=cursor, columns=columns)
+    except Exception:
+        logger.exception("vendor listing source=database key=%s failed after retries", cache_key)
+        return jsonify({"error": "Failed to fetch vendors after retries."}), 500
+
+    result = load_vendor_summaries(vendors, fields)
+    response_data = jsonify(result).get_data(as_text=True)
+
+    # Store the response in the cache, along with what invalidate_vendor_listings needs to purge it
+    cache.set(cache_key, {
+        "vendor_ids": [vendor.VendorID for vendor in vendors],
+        "filters": {"location": location, "min_rating": min_rating, "vendor_name": vendor_name, "food_item": food_item},
+        "next_cursor": next_cursor,
+        "data": response_data
+    })
+    logger.debug("vendor listing source=database key=%s vendors=%s elapsed_ms=%.2f",
+                 cache_key, len(vendors), (time.perf_counter() - start_time) * 1000)
+    return response_data, 200, page_headers(next_cursor)
+
+def iter_vendor_summaries(location, min_rating, vendor_name, food_item, cursor, fields):
+    """Yield /vendors entries for every match, walking the keyset pages of query_vendors.
+
+    Each batch is a separate short query, so no result set stays open while the
+    reviews and menus of the previous batch are loaded.
+    """
+    columns = [name for name in fields if name in VENDOR_COLUMNS]
+    while True:
+        vendors, next_cursor = query_vendors(location=location, min_rating=min_rating, vendor_name=vendor_name,
+                                             food_item=food_item, limit=stream_batch_size(), cursor=cursor,
+                                             columns=columns)
+        yield from load_vendor_summaries(vendors, fields)
+        if next_cursor is None:
+            return
+        cursor = decode_cursor(next_cursor)
+
+@bus.subscribe
+def invalidate_vendor_listings(event):
+    """Purge the cached vendor listings that a committed write may have changed."""
+    if event.kind not in ("menu", "rating", "vendor"):
+        return
+
+    def affected(entry):
+        if event.vendor_id in entry["vendor_ids"]:
+            return True
+        filters = entry["filters"]
+        if event.kind == "rating":
+            # The new average can move the vendor across any min_rating threshold
+            return bool(filters["min_rating"])
+        if event.kind == "menu":
+            return bool(filters.get("food_item"))
+        if event.kind == "vendor" and event.action == "insert":
+            return True
+        if event.kind == "vendor" and event.action == "update":
+            return ("Location" in event.fields and bool(filters["location"])) or \
+                   ("VendorName" in event.fields and bool(filters["vendor_name"]))
+        return False
+
+    purged = cache.delete_matching("vendors_", affected)
+    if purged:
+        logger.info("vendor listing invalidated entries=%s kind=%s action=%s vendor_id=%s",
+                    purged, event.kind, event.action, event.vendor_id)
 
 @customer_bp.route('/orders', methods=['POST'])
 @login_required
@@ -141,68 +211,93 @@ def place_order():
     if not vendor_id or not items:
         return jsonify({"error": "VendorID and items are required."}), 400
 
-    # Validate all items belong to the same vendor
-    for item in items:
-        menu_item = Menu.query.filter_by(MenuID=item['menuID'], VendorID=vendor_id).first()
-        if not menu_item:
-            return jsonify({"error": f"Menu item {item['menuID']} does not belong to vendor {vendor_id}."}), 400
+    try:
+        lines = [(int(item['menuID']), int(item['quantity'])) for item in items]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "Each item needs an integer menuID and quantity."}), 400
+    if any(quantity < 1 for _, quantity in lines):
+        return jsonify({"error": "Quantities must be positive."}), 400
+
+    # Validate every item against the vendor's menu in one query; prices come from Menu, not the client
+    prices = dict(
+        db.session.query(Menu.MenuID, Menu.Price)
+        .filter(Menu.VendorID == vendor_id, Menu.MenuID.in_({menu_id for menu_id, _ in lines}))
+    )
+    for menu_id, _ in lines:
+        if menu_id not in prices:
+            return jsonify({"error": f"Menu item {menu_id} does not belong to vendor {vendor_id}."}), 400
 
-    total_price = sum(item['price'] * item['quantity'] for item in items)
+    customer = current_customer()
 
-    customer = Customer.query.filter_by(UserID=current_user.UserID).first()
+    header = OrderHeader(VendorID=vendor_id, CustomerID=customer.CustomerID)
+    db.session.add(header)
+    db.session.flush()
+    header_id = header.OrderHeaderID
 
-    # Create a new order
-    for item in items:
-        order = Order(
-            VendorID=vendor_id,
-            CustomerID=customer.CustomerID,
-            MenuID=item['menuID'],
-            Quantity=item['quantity'],
-            TotalPrice=item['price'] * item['quantity'],
-            OrderStatus='Pending'
-        )
-        db.session.add(order)
+    rows = [
+        {
+            "OrderHeaderID": header_id,
+            "VendorID": vendor_id,
+            "CustomerID": customer.CustomerID,
+            "MenuID": menu_id,
+            "Quantity": quantity,
+            "TotalPrice": prices[menu_id] * quantity,
+            "OrderStatus": 'Pending'
+        }
+        for menu_id, quantity in lines
+    ]
+    total_price = sum(row["TotalPrice"] for row in rows)
 
-    db.session.commit()
+    # All order lines go out as one executemany INSERT in the header's transaction
+    db.session.execute(insert(Order), rows)
 
-    # Notify the vendor
-    socketio.emit(
+    # Notify the vendor; the outbox row commits with the order and is sent off the request path
+    record_event(
         'new_order',
+        f'vendor_{vendor_id}',
         {
+            "OrderHeaderID": header_id,
             "VendorID": vendor_id,
-            "Orders": [{"menuID": item['menuID'], "quantity": item['quantity'], "price": item['price']} for item in items],
-            "TotalPrice": total_price
-        },
-        to=f'vendor_{vendor_id}'
+            "Orders": [{"menuID": menu_id, "quantity": quantity, "price": float(prices[menu_id])}
+                       for menu_id, quantity in lines],
+            "TotalPrice": float(total_price)
+        }
     )
+    # An order opens the vendor-customer chat room, or moves it to the top of both room lists
+    record_order(vendor_id, customer.CustomerID, time.time())
+    db.session.commit()
+    room_directory.forget(vendor_id, customer.CustomerID)
 
-    return jsonify({"message": "Order placed successfully."}), 201
+    return jsonify({"message": "Order placed successfully.", "OrderHeaderID": header_id}), 201
 
 @customer_bp.route('/orders/customer', methods=['GET'])
 @login_required
 def get_customer_orders():
-    """Retrieve all orders placed by the logged-in customer."""
+    """Retrieve the logged-in customer's orders, newest first, one page at a time (or streamed with ?stream=1)."""
     if current_user.Role != 'Customer':
         return jsonify({"error": "Access denied. Only customers can view orders."}), 403
 
-    customer = Customer.query.filter_by(UserID=current_user.UserID).first()
+    customer = current_customer()
     if not customer:
         return jsonify({"error": "Customer not found"}), 404
 
-    orders = Order.query.filter_by(CustomerID=customer.CustomerID).all()
-    order_list = [
-        {
-            "OrderID": order.OrderID,
-            "MenuItem": Menu.query.get(order.MenuID).FoodItem,
-            "Quantity": order.Quantity,
-            "TotalPrice": str(order.TotalPrice),
-            "OrderStatus": order.OrderStatus,
-            "OrderDate": order.OrderDate.strftime('%Y-%m-%d %H:%M:%S')
-        }
-        for order in orders
-    ]
-
-    return jsonify(order_list), 200
+    # ?group=order returns whole orders (header, totals and items) instead of one entry per item
+    grouped = request.args.get("group") == "order"
+    if grouped:
+        criteria, iter_page, query_page = [OrderHeader.CustomerID == customer.CustomerID], iter_order_groups, query_order_group_page
+    else:
+        criteria, iter_page, query_page = [Order.CustomerID == customer.CustomerID], iter_orders, query_order_page
+    try:
+        limit, cursor = page_args()
+        fields = field_args(CUSTOMER_ORDER_GROUP_FIELDS if grouped else CUSTOMER_ORDER_FIELDS)
+        if streaming_requested():
+            parse_order_cursor(cursor)  # reject a bad cursor before the response starts
+            return stream_json(iter_page(criteria, fields, cursor, stream_batch_size()))
+        order_list, next_cursor = query_page(criteria, fields, limit, cursor)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(order_list), 200, page_headers(next_cursor)
 
 @customer_bp.route('/vendors/<int:vendor_id>/review', methods=['POST'])
 @login_required
@@ -211,7 +306,7 @@ def add_review(vendor_id):
     if current_user.Role != 'Customer':
         return jsonify({"error": "Only customers can add reviews."}), 403
 
-    customer = Customer.query.filter_by(UserID=current_user.UserID).first()
+    customer = current_customer()
     if not customer:
         return jsonify({"error": "Customer not found"}), 404
 
@@ -246,7 +341,7 @@ def add_review(vendor_id):
     db.session.commit()
 
     # Return the updated average rating
-    avg_rating = db.session.query(db.func.avg(Ratings.Stars)).filter(Ratings.VendorID == vendor_id).scalar()
+    avg_rating = db.session.query(VendorRatingSummary.AvgRating).filter(VendorRatingSummary.VendorID == vendor_id).scalar()
     avg_rating = round(avg_rating, 2) if avg_rating else None
 
     return jsonify({
@@ -0,0 +1,72 @@
+import logging
+from contextlib import ExitStack
+
+from app.routes.metrics_utils import InstrumentedQueuePool
+
+logger = logging.getLogger(__name__)
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS built from the DB_POOL_* settings."""
+    return {
+        # Records how long each checkout waits for a pooled connection (see /metrics)
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': config.get('DB_POOL_SIZE', 10),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', False),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', -1),
+    }
+
+
+def replica_binds(config):
+    """``{"replica_<n>": engine options}`` for DB_REPLICA_URLS, numbered from 1, pooled like the primary."""
+    return {f'replica_{n}': dict(engine_options(config), url=url)
+            for n, url in enumerate(config.get('DB_REPLICA_URLS') or (), start=1)}
+
+
+def configure_engines(app):
+    """Fill in the engine options and replica binds unless the app set them explicitly."""
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+    for key, options in replica_binds(app.config).items():
+        binds.setdefault(key, options)
+
+
+def warm_up_pools(db, connections):
+    """Open up to ``connections`` connections per engine so they sit in the pool before traffic arrives.
+
+    The connections are held together (otherwise the pool would hand back the same one)
+    and never more than pool_size, since overflow connections are closed on return. A
+    database that is down is logged, not raised: the app still starts and connects later.
+    """
+    warmed = {}
+    for bind, engine in db.engines.items():
+        count = min(connections, engine.pool.size()) if hasattr(engine.pool, 'size') else 0
+        try:
+            with ExitStack() as stack:
+                for _ in range(count):
+                    stack.enter_context(engine.connect())
+        except Exception:
+            logger.exception("Could not warm up the %s connection pool", bind or 'default')
+            continue
+        warmed[bind or 'default'] = count
+    if warmed:
+        logger.info("Warmed up connection pools: %s", warmed)
+    return warmed
+
+
+def pool_stats(db):
+    """``{bind: {size, checked_in, checked_out, overflow}}`` for every engine with a QueuePool."""
+    stats = {}
+    for bind, engine in db.engines.items():
+        pool = engine.pool
+        if not hasattr(pool, 'checkedout'):
+            continue
+        stats[bind or 'default'] = {
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0),
+        }
+    return stats
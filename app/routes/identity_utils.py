@@ -0,0 +1,97 @@
+from collections import namedtuple
+from flask_login import UserMixin, current_user
+from sqlalchemy.orm import joinedload
+from app.models import AuthUser
+from app.routes.cache_utils import MemoryCache
+from app.routes.invalidation_utils import bus
+
+# Detached, read-only copies of the profile rows, safe to share between requests and threads
+VendorProfile = namedtuple("VendorProfile", ["VendorID", "VendorName", "Phone", "Email", "Address", "Location", "UserID"])
+CustomerProfile = namedtuple("CustomerProfile", ["CustomerID", "CustomerName", "Phone", "Location", "UserID"])
+
+
+class UserIdentity(UserMixin):
+    """What Flask-Login keeps as ``current_user``: the AuthUser columns plus its profile.
+
+    ``vendor``/``customer`` mirror the AuthUser relationships, so existing
+    ``current_user.vendor.VendorID`` style code keeps working without a lazy load.
+    """
+
+    def __init__(self, UserID, Username, Email, Role, CreatedAt=None, vendor=None, customer=None):
+        self.UserID = UserID
+        self.Username = Username
+        self.Email = Email
+        self.Role = Role
+        self.CreatedAt = CreatedAt
+        self.vendor = vendor
+        self.customer = customer
+
+    @classmethod
+    def from_user(cls, user):
+        vendor = customer = None
+        if user.vendor is not None:
+            vendor = VendorProfile(*(getattr(user.vendor, name) for name in VendorProfile._fields))
+        if user.customer is not None:
+            customer = CustomerProfile(*(getattr(user.customer, name) for name in CustomerProfile._fields))
+        return cls(user.UserID, user.Username, user.Email, user.Role, user.CreatedAt, vendor, customer)
+
+    def get_id(self):
+        return str(self.UserID)
+
+
+class IdentityCache:
+    """Bounded TTL cache of UserIdentity snapshots keyed on UserID.
+
+    Flask-Login already keeps the loaded user for the rest of a request, so this is the
+    cross-request layer. Entries are dropped on committed AuthUser/Vendor/Customer writes
+    in this process; other processes fall back to the (short) TTL.
+    """
+
+    def __init__(self):
+        self._entries = MemoryCache(max_entries=10000, ttl_seconds=60)
+
+    def init_app(self, app):
+        self._entries = MemoryCache(max_entries=app.config.get('IDENTITY_CACHE_MAX_ENTRIES', 10000),
+                                    ttl_seconds=app.config.get('IDENTITY_CACHE_TTL_SECONDS', 60))
+
+    def load(self, user_id):
+        """Return the identity for ``user_id``; a miss costs one joined query."""
+        identity = self._entries.get(user_id)
+        if identity is None:
+            user = (
+                AuthUser.query
+                .options(joinedload(AuthUser.vendor), joinedload(AuthUser.customer))
+                .filter(AuthUser.UserID == user_id)
+                .first()
+            )
+            if user is None:
+                return None
+            identity = UserIdentity.from_user(user)
+            self._entries.set(user_id, identity)
+        return identity
+
+    def forget(self, user_id):
+        self._entries.delete(user_id)
+
+    def stats(self):
+        return self._entries.stats.as_dict()
+
+
+identity_cache = IdentityCache()
+
+
+@bus.subscribe
+def invalidate_identity(event):
+    """Drop a cached identity once its AuthUser, Vendor or Customer row changed."""
+    if event.user_id is not None:
+        identity_cache.forget(event.user_id)
+
+
+def current_vendor():
+    """The logged-in user's VendorProfile, or None for customers and anonymous users."""
+    return getattr(current_user, "vendor", None)
+
+
+def current_customer():
+    """The logged-in user's CustomerProfile, or None for vendors and anonymous users."""
+    return getattr(current_user, "customer", None)
@@ -0,0 +1,80 @@
+from collections import namedtuple
+import logging
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.models import AuthUser, Customer, Menu, Ratings, Vendor
+
+logger = logging.getLogger(__name__)
+
+# kind is "menu", "rating", "vendor", "customer" or "user"; action is "insert", "update" or
+# "delete"; fields holds the changed column names for vendor updates. user_id is set for
+# the account-level kinds (vendor, customer, user).
+InvalidationEvent = namedtuple("InvalidationEvent", ["kind", "vendor_id", "action", "fields", "user_id"],
+                               defaults=(None,))
+
+_PENDING_KEY = "invalidation_events"
+
+
+class InvalidationBus:
+    """Fan out data-change events to subscribers once the transaction has committed."""
+
+    def __init__(self):
+        self._subscribers = []
+
+    def subscribe(self, handler):
+        self._subscribers.append(handler)
+        return handler
+
+    def publish(self, event):
+        for handler in self._subscribers:
+            try:
+                handler(event)
+            except Exception:
+                # A failed purge must never fail the write that triggered it; the TTL still applies
+                logger.exception("Invalidation handler %r failed for %s", handler, event)
+
+
+bus = InvalidationBus()
+
+
+def _changed_fields(obj):
+    state = inspect(obj)
+    return tuple(attr.key for attr in state.attrs if attr.history.has_changes())
+
+
+def _collect(session, flush_context):
+    pending = session.info.setdefault(_PENDING_KEY, [])
+    for action, objects in (("insert", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objects:
+            if isinstance(obj, Menu):
+                pending.append(InvalidationEvent("menu", obj.VendorID, action, ()))
+            elif isinstance(obj, Ratings):
+                pending.append(InvalidationEvent("rating", obj.VendorID, action, ()))
+            elif isinstance(obj, Vendor):
+                fields = _changed_fields(obj) if action == "update" else ()
+                if action != "update" or fields:
+                    pending.append(InvalidationEvent("vendor", obj.VendorID, action, fields, obj.UserID))
+            elif isinstance(obj, Customer):
+                pending.append(InvalidationEvent("customer", None, action, (), obj.UserID))
+            elif isinstance(obj, AuthUser):
+                pending.append(InvalidationEvent("user", None, action, (), obj.UserID))
+
+
+def _publish(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    for event_ in dict.fromkeys(pending):  # drop duplicates, keep order
+        bus.publish(event_)
+
+
+def _discard(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def register_session_hooks():
+    """Record Menu/Ratings/Vendor/Customer/AuthUser writes on flush and publish them after commit."""
+    if not event.contains(Session, "after_flush", _collect):
+        event.listen(Session, "after_flush", _collect)
+        event.listen(Session, "after_commit", _publish)
+        event.listen(Session, "after_soft_rollback", _discard)
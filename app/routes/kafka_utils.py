@@ -1,21 +1,220 @@
-from kafka import KafkaProducer, KafkaConsumer
 import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from collections import defaultdict, deque
+
+logger = logging.getLogger(__name__)
 
 # Kafka Configuration
 KAFKA_BROKER = 'localhost:9092'
 TOPIC = 'chat_messages'
 
-# Kafka Producer
-producer = KafkaProducer(
-    bootstrap_servers=KAFKA_BROKER,
-    value_serializer=lambda v: json.dumps(v).encode('utf-8')
-)
-
-# Kafka Consumer
-consumer = KafkaConsumer(
-    TOPIC,
-    bootstrap_servers=KAFKA_BROKER,
-    auto_offset_reset='earliest',
-    value_deserializer=lambda x: json.loads(x.decode('utf-8')),
-    group_id='chat_consumer_group'
-)
+
+class InMemoryBroker:
+    """Process-local stand-in for Kafka, used in tests and single-process deployments."""
+
+    # Only this process consumes what it publishes
+    fanout = False
+
+    def __init__(self):
+        self._topics = defaultdict(deque)
+        self._cond = threading.Condition()
+
+    def send_batch(self, topic, messages):
+        with self._cond:
+            self._topics[topic].extend(messages)
+            self._cond.notify_all()
+
+    def poll(self, topic, timeout=1.0, max_records=500):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            pending = self._topics[topic]
+            while not pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
+            return [pending.popleft() for _ in range(min(max_records, len(pending)))]
+
+    def close(self):
+        pass
+
+
+class KafkaBroker:
+    """Kafka transport; the client objects are only built on first use."""
+
+    # Every process consumes every message (one consumer group per process)
+    fanout = True
+
+    def __init__(self, bootstrap_servers=KAFKA_BROKER, group_id=None, linger_ms=5, batch_size=16384):
+        self.bootstrap_servers = bootstrap_servers
+        # Every worker must see every message to reach its own sockets, so each process
+        # reads with its own consumer group
+        self.group_id = group_id or f"chat_consumer_group-{socket.gethostname()}-{os.getpid()}"
+        self.linger_ms = linger_ms
+        self.batch_size = batch_size
+        self._producer = None
+        self._consumers = {}
+
+    @property
+    def producer(self):
+        if self._producer is None:
+            from kafka import KafkaProducer
+            self._producer = KafkaProducer(
+                bootstrap_servers=self.bootstrap_servers,
+                value_serializer=lambda v: json.dumps(v).encode('utf-8'),
+                linger_ms=self.linger_ms,
+                batch_size=self.batch_size
+            )
+        return self._producer
+
+    def _consumer(self, topic):
+        if topic not in self._consumers:
+            from kafka import KafkaConsumer
+            self._consumers[topic] = KafkaConsumer(
+                topic,
+                bootstrap_servers=self.bootstrap_servers,
+                auto_offset_reset='latest',
+                value_deserializer=lambda x: json.loads(x.decode('utf-8')),
+                group_id=self.group_id
+            )
+        return self._consumers[topic]
+
+    def send_batch(self, topic, messages):
+        for message in messages:
+            # send() only appends to the client's own linger/batch buffer
+            self.producer.send(topic, message).add_errback(
+                lambda exc: logger.error("Kafka delivery to %s failed: %s", topic, exc))
+
+    def poll(self, topic, timeout=1.0, max_records=500):
+        records = self._consumer(topic).poll(timeout_ms=int(timeout * 1000), max_records=max_records)
+        return [record.value for batch in records.values() for record in batch]
+
+    def close(self):
+        if self._producer is not None:
+            self._producer.flush()
+            self._producer.close()
+        for consumer in self._consumers.values():
+            consumer.close()
+
+
+class BatchingProducer:
+    """Non-blocking publisher that hands messages to the broker in batches.
+
+    publish() only enqueues into a bounded local queue; a background thread sends a
+    batch once ``batch_size`` messages are waiting or ``linger_ms`` has passed since the
+    first one. When the queue is full the message is dropped and counted, so a slow
+    broker never blocks a request handler.
+    """
+
+    def __init__(self, broker, topic=TOPIC, batch_size=100, linger_ms=5, max_queue=10000):
+        self.broker = broker
+        self.topic = topic
+        self.batch_size = batch_size
+        self.linger_ms = linger_ms
+        self.published = 0
+        self.dropped = 0
+        self.batches = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def publish(self, message):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Chat producer queue full, dropping message")
+            return False
+        self.published += 1
+        return True
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="chat-producer", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.linger_ms / 1000
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.broker.send_batch(self.topic, batch)
+                self.batches += 1
+            except Exception:
+                logger.exception("Failed to send %s chat message(s)", len(batch))
+
+    def stats(self):
+        return {"published": self.published, "dropped": self.dropped, "batches": self.batches,
+                "queued": self._queue.qsize()}
+
+
+class ConsumerWorker:
+    """Background loop that polls the broker and passes each message to ``handler``."""
+
+    def __init__(self, broker, handler, topic=TOPIC, max_records=500, start_task=None):
+        self.broker = broker
+        self.handler = handler
+        self.topic = topic
+        self.max_records = max_records
+        self.delivered = 0
+        self._start_task = start_task
+        self._started = False
+        self._running = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = self._running = True
+        if self._start_task is not None:
+            self._start_task(self._run)
+        else:
+            threading.Thread(target=self._run, name="chat-consumer", daemon=True).start()
+
+    def stop(self):
+        self._running = False
+
+    def _run(self):
+        while self._running:
+            try:
+                messages = self.broker.poll(self.topic, timeout=1.0, max_records=self.max_records)
+            except Exception:
+                logger.exception("Polling %s failed", self.topic)
+                time.sleep(1)
+                continue
+            for message in messages:
+                try:
+                    self.handler(message)
+                    self.delivered += 1
+                except Exception:
+                    logger.exception("Delivering chat message failed")
+
+
+def create_broker(config):
+    """Build the broker named by CHAT_BROKER ("memory" or "kafka")."""
+    backend = config.get('CHAT_BROKER', 'memory')
+    if backend == 'memory':
+        return InMemoryBroker()
+    if backend == 'kafka':
+        return KafkaBroker(
+            bootstrap_servers=config.get('KAFKA_BROKER', KAFKA_BROKER),
+            group_id=config.get('KAFKA_CONSUMER_GROUP'),
+            linger_ms=config.get('CHAT_LINGER_MS', 5),
+            batch_size=config.get('KAFKA_BATCH_BYTES', 16384)
+        )
+    raise ValueError(f"Unknown CHAT_BROKER: {backend}")
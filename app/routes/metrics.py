@@ -0,0 +1,46 @@
+from flask import Blueprint, Response
+from app import db
+from app.routes.cache_utils import cache
+from app.routes.engine_utils import pool_stats
+from app.routes.chat import chat_pipeline, history_writer
+from app.routes.conversation_utils import room_directory
+from app.routes.identity_utils import identity_cache
+from app.routes.metrics_utils import metrics
+from app.routes.outbox_utils import notification_dispatcher
+from app.routes.password_utils import password_hasher
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def _cache_stats():
+    return {"vendor_listings": cache.stats(), "identity": identity_cache.stats(), "chat_rooms": room_directory.stats()}
+
+
+metrics.gauge("caterquest_cache_hit_ratio", "Hit ratio of each cache since start.",
+              lambda: {(name,): stats["hit_ratio"] for name, stats in _cache_stats().items()}, ("cache",))
+metrics.gauge("caterquest_cache_lookups", "Cache lookups since start, by result.",
+              lambda: {(name, result): stats[result] for name, stats in _cache_stats().items()
+                       for result in ("hits", "misses")}, ("cache", "result"))
+metrics.gauge("caterquest_db_pool_connections", "Pooled connections per engine, by state.",
+              lambda: {(bind, state): stats[state] for bind, stats in pool_stats(db).items()
+                       for state in ("checked_in", "checked_out", "overflow")}, ("bind", "state"))
+metrics.gauge("caterquest_db_pool_size", "Configured pool_size per engine.",
+              lambda: {(bind,): stats["size"] for bind, stats in pool_stats(db).items()}, ("bind",))
+metrics.gauge("caterquest_password_hash_pending", "bcrypt jobs running or queued.",
+              lambda: password_hasher.stats()["pending"])
+metrics.gauge("caterquest_password_hash_rejected", "bcrypt jobs refused with 429 since start.",
+              lambda: password_hasher.stats()["rejected"])
+metrics.gauge("caterquest_chat_producer_queued", "Chat messages waiting for the producer thread.",
+              lambda: chat_pipeline.producer.stats()["queued"] if chat_pipeline.producer else 0)
+metrics.gauge("caterquest_chat_producer_dropped", "Chat messages dropped on a full producer queue.",
+              lambda: chat_pipeline.producer.stats()["dropped"] if chat_pipeline.producer else 0)
+metrics.gauge("caterquest_chat_history_written", "Chat messages persisted by the write-behind buffer.",
+              lambda: history_writer.written)
+metrics.gauge("caterquest_order_notifications", "Outbox events handled since start, by outcome.",
+              lambda: {(outcome,): count for outcome, count in notification_dispatcher.stats().items()}, ("outcome",))
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Expose the process metrics in the Prometheus text format."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
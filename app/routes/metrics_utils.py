@@ -0,0 +1,186 @@
+import bisect
+import threading
+import time
+from collections import defaultdict
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+# Seconds; covers cache hits (sub-millisecond) up to retried database calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] += amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.setdefault(labels, [0] * (len(self.buckets) + 2))
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, [('le', '+Inf')])} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series[-2])}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    """Value read at scrape time from ``fn``: a number, or ``{label values tuple: number}``."""
+
+    def __init__(self, name, help, fn, labelnames=()):
+        self.name, self.help, self.fn, self.labelnames = name, help, fn, tuple(labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        values = self.fn()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-local metrics rendered in the Prometheus text format by /metrics."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, fn, labelnames=()):
+        return self._register(Gauge(name, help, fn, labelnames))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+REQUEST_LATENCY = metrics.histogram(
+    "caterquest_http_request_duration_seconds", "Time to build a response, by endpoint.",
+    ("endpoint", "method", "status"))
+REQUEST_QUERIES = metrics.histogram(
+    "caterquest_http_request_db_queries", "SQL statements executed per request.", ("endpoint",), COUNT_BUCKETS)
+REQUEST_QUERY_TIME = metrics.histogram(
+    "caterquest_http_request_db_seconds", "Time spent in SQL statements per request.", ("endpoint",))
+DB_QUERIES = metrics.counter("caterquest_db_queries_total", "SQL statements executed.")
+DB_QUERY_TIME = metrics.histogram("caterquest_db_query_duration_seconds", "Duration of single SQL statements.")
+POOL_WAIT = metrics.histogram(
+    "caterquest_db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.")
+POOL_TIMEOUTS = metrics.counter(
+    "caterquest_db_pool_checkout_timeouts_total", "Connection checkouts that gave up after pool_timeout.")
+SOCKETIO_EMITS = metrics.counter("caterquest_socketio_emits_total", "Socket.IO events emitted.", ("event",))
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a free connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - start)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    DB_QUERIES.inc()
+    DB_QUERY_TIME.observe(elapsed)
+    if has_request_context() and "metrics_start" in g:
+        g.metrics_queries += 1
+        g.metrics_query_time += elapsed
+
+
+def _start_request():
+    g.metrics_start = time.perf_counter()
+    g.metrics_queries = 0
+    g.metrics_query_time = 0.0
+
+
+def _finish_request(response):
+    """Record latency and query totals; streamed bodies are timed up to the first byte."""
+    if "metrics_start" in g:
+        endpoint = request.endpoint or "unmatched"
+        REQUEST_LATENCY.observe(time.perf_counter() - g.metrics_start, endpoint, request.method, response.status_code)
+        REQUEST_QUERIES.observe(g.metrics_queries, endpoint)
+        REQUEST_QUERY_TIME.observe(g.metrics_query_time, endpoint)
+    return response
+
+
+def init_metrics(app):
+    """Time every request and SQL statement of ``app``."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
@@ -0,0 +1,75 @@
+import logging
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, inspect, update
+
+from app import db
+from app.models import Order, OrderHeader
+
+logger = logging.getLogger(__name__)
+
+
+def _ensure_schema():
+    """Bring a database created before OrderHeader existed up to the current models."""
+    engine = db.engine
+    OrderHeader.__table__.create(engine, checkfirst=True)
+    columns = {column["name"] for column in inspect(engine).get_columns(Order.__tablename__)}
+    if "OrderHeaderID" not in columns:
+        quote = engine.dialect.identifier_preparer.quote
+        with engine.begin() as connection:
+            connection.exec_driver_sql(
+                f"ALTER TABLE {quote(Order.__tablename__)} ADD COLUMN {quote('OrderHeaderID')} INTEGER NULL"
+            )
+    for index in Order.__table__.indexes:
+        index.create(engine, checkfirst=True)
+
+
+def migrate_order_headers(batch_size=1000):
+    """Group header-less Order rows into OrderHeaders and return how many headers were created.
+
+    Rows written by one checkout share VendorID, CustomerID and OrderDate, so each such
+    group becomes one order. Runs in batches and can be re-run safely.
+    """
+    _ensure_schema()
+    assign_header = (
+        update(Order.__table__)
+        .where(Order.__table__.c.VendorID == bindparam("_vendor_id"),
+               Order.__table__.c.CustomerID == bindparam("_customer_id"),
+               Order.__table__.c.OrderDate == bindparam("_order_date"),
+               Order.__table__.c.OrderHeaderID.is_(None))
+        .values(OrderHeaderID=bindparam("_header_id"))
+    )
+    created = 0
+    while True:
+        groups = (
+            db.session.query(Order.VendorID, Order.CustomerID, Order.OrderDate)
+            .filter(Order.OrderHeaderID.is_(None), Order.OrderDate.isnot(None))
+            .group_by(Order.VendorID, Order.CustomerID, Order.OrderDate)
+            .limit(batch_size)
+            .all()
+        )
+        if not groups:
+            break
+        headers = [OrderHeader(VendorID=vendor_id, CustomerID=customer_id, OrderDate=order_date)
+                   for vendor_id, customer_id, order_date in groups]
+        db.session.add_all(headers)
+        db.session.flush()
+        db.session.connection().execute(assign_header, [
+            {"_vendor_id": header.VendorID, "_customer_id": header.CustomerID,
+             "_order_date": order_date, "_header_id": header.OrderHeaderID}
+            for header, (_, _, order_date) in zip(headers, groups)
+        ])
+        db.session.commit()
+        created += len(headers)
+        logger.info("Created %s order header(s)", created)
+    return created
+
+
+@click.command("migrate-order-headers")
+@click.option("--batch-size", default=1000, show_default=True, help="Orders grouped per transaction.")
+@with_appcontext
+def migrate_order_headers_command(batch_size):
+    """Add the OrderHeader table and group existing order rows into orders."""
+    count = migrate_order_headers(batch_size)
+    click.echo(f"Created {count} order header(s).")
@@ -0,0 +1,134 @@
+import json
+import logging
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db, socketio
+from app.models import OrderEvent
+from app.routes.metrics_utils import SOCKETIO_EMITS
+
+logger = logging.getLogger(__name__)
+
+_WAKE_KEY = "outbox_events"
+
+
+def record_event(event_name, room, payload, coalesce_key=None):
+    """Queue a notification in the current transaction; it is sent only if the transaction commits."""
+    now = time.time()
+    db.session.add(OrderEvent(Event=event_name, Room=room, Payload=json.dumps(payload, default=str),
+                              CoalesceKey=coalesce_key, Status='Pending', Attempts=0,
+                              CreatedAt=now, NextAttemptAt=now))
+    db.session.info[_WAKE_KEY] = True
+
+
+class NotificationDispatcher:
+    """Background sender for OrderEvent outbox rows.
+
+    Request handlers only insert rows (see record_event); this thread claims due
+    rows in batches, emits them to their Socket.IO rooms and marks them delivered.
+    Pending status updates for the same order collapse to the newest one, failed
+    emits are retried with exponential backoff, and anything still pending after a
+    crash is picked up when the next process starts.
+    """
+
+    def __init__(self, batch_size=100, poll_interval=1.0, max_attempts=5, retry_base_seconds=1.0):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.app = None
+        self.delivered = 0
+        self.superseded = 0
+        self.retried = 0
+        self.failed = 0
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config.get('OUTBOX_BATCH_SIZE', self.batch_size)
+        self.poll_interval = app.config.get('OUTBOX_POLL_INTERVAL_SECONDS', self.poll_interval)
+        self.max_attempts = app.config.get('OUTBOX_MAX_ATTEMPTS', self.max_attempts)
+        if not event.contains(Session, "after_commit", _wake_after_commit):
+            event.listen(Session, "after_commit", _wake_after_commit)
+            event.listen(Session, "after_soft_rollback", _discard_wake)
+        # Drain whatever an earlier process left behind once this one starts serving
+        app.before_request(self.start)
+
+    def start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="order-notifications", daemon=True)
+                    self._thread.start()
+
+    def wake(self):
+        self.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            try:
+                with self.app.app_context():
+                    while self.dispatch() == self.batch_size:
+                        pass
+            except Exception:
+                logger.exception("Order notification dispatch failed")
+
+    def dispatch(self):
+        """Send one batch of due events and return how many rows it handled."""
+        now = time.time()
+        rows = (
+            OrderEvent.query
+            .filter(OrderEvent.Status == 'Pending', OrderEvent.NextAttemptAt <= now)
+            .order_by(OrderEvent.EventID)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)  # several workers can dispatch without double sends
+            .all()
+        )
+        latest = {}
+        for row in rows:
+            if row.CoalesceKey:
+                latest[row.CoalesceKey] = row.EventID
+        for row in rows:
+            if row.CoalesceKey and latest[row.CoalesceKey] != row.EventID:
+                row.Status = 'Superseded'
+                self.superseded += 1
+                continue
+            try:
+                socketio.emit(row.Event, json.loads(row.Payload), to=row.Room)
+            except Exception:
+                row.Attempts += 1
+                if row.Attempts >= self.max_attempts:
+                    row.Status = 'Failed'
+                    self.failed += 1
+                    logger.exception("Giving up on %s event %s after %s attempts", row.Event, row.EventID, row.Attempts)
+                else:
+                    row.NextAttemptAt = now + self.retry_base_seconds * 2 ** (row.Attempts - 1)
+                    self.retried += 1
+                continue
+            SOCKETIO_EMITS.inc(row.Event)
+            row.Status = 'Delivered'
+            self.delivered += 1
+        db.session.commit()
+        return len(rows)
+
+    def stats(self):
+        return {"delivered": self.delivered, "superseded": self.superseded,
+                "retried": self.retried, "failed": self.failed}
+
+
+notification_dispatcher = NotificationDispatcher()
+
+
+def _wake_after_commit(session):
+    if session.info.pop(_WAKE_KEY, False):
+        notification_dispatcher.wake()
+
+
+def _discard_wake(session, previous_transaction):
+    session.info.pop(_WAKE_KEY, None)
@@ -0,0 +1,59 @@
+import base64
+import json
+from urllib.parse import urlencode
+from flask import current_app, request
+
+
+class PaginationError(ValueError):
+    """Raised for a malformed cursor, page size or field list; routes answer 400."""
+
+
+def encode_cursor(values):
+    """Opaque cursor for the keyset values of the last row on a page."""
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise PaginationError("Invalid cursor.")
+    if not isinstance(values, list):
+        raise PaginationError("Invalid cursor.")
+    return values
+
+
+def page_args():
+    """Read ``limit`` and ``cursor`` from the query string; the page size is capped at PAGE_SIZE_MAX."""
+    default = current_app.config.get("PAGE_SIZE_DEFAULT", 50)
+    maximum = current_app.config.get("PAGE_SIZE_MAX", 200)
+    try:
+        limit = int(request.args.get("limit", default))
+    except ValueError:
+        raise PaginationError("limit must be an integer.")
+    if limit < 1:
+        raise PaginationError("limit must be positive.")
+    cursor = request.args.get("cursor")
+    return min(limit, maximum), decode_cursor(cursor) if cursor else None
+
+
+def field_args(allowed):
+    """Parse ``fields=a,b`` into a tuple ordered like ``allowed``; no parameter means every field."""
+    raw = request.args.get("fields")
+    if not raw:
+        return tuple(allowed)
+    requested = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise PaginationError(f"Unknown field(s): {', '.join(sorted(unknown))}.")
+    return tuple(name for name in allowed if name in requested)
+
+
+def page_headers(next_cursor):
+    """Response headers pointing at the next page, if there is one."""
+    if next_cursor is None:
+        return {}
+    args = request.args.to_dict()
+    args["cursor"] = next_cursor
+    return {"X-Next-Cursor": next_cursor, "Link": f'<{request.path}?{urlencode(args)}>; rel="next"'}
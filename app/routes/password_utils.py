@@ -0,0 +1,109 @@
+import hmac
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+import bcrypt
+
+from app.routes.async_utils import native_executor
+
+logger = logging.getLogger(__name__)
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing pool already has its maximum number of pending jobs; routes answer 429."""
+
+
+# Module-level so a process pool can pickle them; hashes match Flask-Bcrypt's (2b prefix, no pre-hash)
+def _hash_password(password, rounds):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=rounds)).decode("utf-8")
+
+
+def _check_password(pw_hash, password):
+    pw_hash = pw_hash.encode("utf-8")
+    return hmac.compare_digest(bcrypt.hashpw(password.encode("utf-8"), pw_hash), pw_hash)
+
+
+def hash_rounds(pw_hash):
+    """The cost factor stored in a ``$2b$12$...`` hash, or None if it cannot be read."""
+    try:
+        return int(pw_hash.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """bcrypt on a bounded worker pool instead of the request thread.
+
+    At most ``max_pending`` hashes may be running or queued; beyond that hash() and
+    check() raise HasherBusy at once rather than letting a login spike pile up work.
+    """
+
+    def __init__(self):
+        self.rounds = 12
+        self.timeout = 10
+        self.max_pending = 0
+        self.pending = 0
+        self.rejected = 0
+        self.completed = 0
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', 12)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT_SECONDS', 10)
+        workers = app.config.get('PASSWORD_HASH_WORKERS') or os.cpu_count() or 2
+        self.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING') or workers * 4
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        if app.config.get('PASSWORD_HASH_POOL', 'thread') == 'process':
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            # bcrypt releases the GIL while hashing, so threads already run in parallel; they stay
+            # OS threads under gevent, where a hash on a greenlet would stall every connection
+            self._executor = native_executor(workers, "bcrypt")
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            logger.warning("Password hashing pool saturated (%s pending)", self.pending)
+            raise HasherBusy()
+        with self._lock:
+            self.pending += 1
+        try:
+            return self._executor.submit(fn, *args).result(timeout=self.timeout)
+        except TimeoutError:
+            with self._lock:
+                self.rejected += 1
+            raise HasherBusy()
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+            self._slots.release()
+
+    def hash(self, password, rounds=None):
+        if not password:
+            raise ValueError('Password must be non-empty.')
+        return self._run(_hash_password, password, rounds or self.rounds)
+
+    def check(self, pw_hash, password):
+        if not pw_hash or not password:
+            return False
+        return self._run(_check_password, pw_hash, password)
+
+    def needs_rehash(self, pw_hash):
+        """True when ``pw_hash`` was made with a different cost than BCRYPT_LOG_ROUNDS."""
+        return hash_rounds(pw_hash) != self.rounds
+
+    def stats(self):
+        with self._lock:
+            return {"pending": self.pending, "max_pending": self.max_pending,
+                    "rejected": self.rejected, "completed": self.completed}
+
+
+password_hasher = PasswordHasher()
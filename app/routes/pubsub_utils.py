@@ -0,0 +1,132 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+
+import socketio
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'flask-socketio'
+
+
+class LocalPubSub:
+    """Process-local fan-out channels: every listener sees every message published after it started.
+
+    Lets several Socket.IO servers in one process (tests, benchmarks) share rooms.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._listeners = defaultdict(list)
+
+    def publish(self, channel, payload):
+        with self._cond:
+            for pending in self._listeners[channel]:
+                pending.append(payload)
+            self._cond.notify_all()
+
+    def listen(self, channel):
+        pending = deque()
+        with self._cond:
+            self._listeners[channel].append(pending)
+        while True:
+            with self._cond:
+                while not pending:
+                    self._cond.wait()
+                batch = list(pending)
+                pending.clear()
+            yield from batch
+
+
+class SQLitePubSub:
+    """Fan-out channels in a SQLite file, shared by every worker process on the host.
+
+    Listeners poll for rows newer than the last one they saw; rows older than
+    ``retention_seconds`` are pruned by the publishers.
+    """
+
+    def __init__(self, path, poll_interval=0.01, retention_seconds=60):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._local = threading.local()
+        self._published = 0
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " channel TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def publish(self, channel, payload):
+        conn = self._connection()
+        now = time.time()
+        conn.execute("INSERT INTO messages (channel, payload, created_at) VALUES (?, ?, ?)", (channel, payload, now))
+        self._published += 1
+        if self._published % 1000 == 0:
+            conn.execute("DELETE FROM messages WHERE created_at < ?", (now - self.retention_seconds,))
+
+    def listen(self, channel):
+        conn = self._connection()
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM messages").fetchone()[0]
+        while True:
+            rows = conn.execute(
+                "SELECT id, payload FROM messages WHERE id > ? AND channel = ? ORDER BY id", (last_id, channel)
+            ).fetchall()
+            if not rows:
+                time.sleep(self.poll_interval)
+                continue
+            last_id = rows[-1][0]
+            for _, payload in rows:
+                yield payload
+
+
+class PubSubClientManager(socketio.PubSubManager):
+    """Socket.IO client manager that shares rooms and emits through a LocalPubSub/SQLitePubSub."""
+
+    name = 'caterquest-pubsub'
+
+    def __init__(self, transport, channel=CHANNEL, write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.transport = transport
+
+    def _publish(self, data):
+        self.transport.publish(self.channel, json.dumps(data))
+
+    def _listen(self):
+        yield from self.transport.listen(self.channel)
+
+
+local_pubsub = LocalPubSub()
+
+
+def create_client_manager(config):
+    """Build the manager named by SOCKETIO_MESSAGE_QUEUE, or None for a single process.
+
+    ``"local"`` shares rooms between servers in this process, ``"sqlite:///path"`` between
+    processes on one host and ``"kafka://host:port"`` between hosts.
+    """
+    url = config.get('SOCKETIO_MESSAGE_QUEUE')
+    channel = config.get('SOCKETIO_CHANNEL', CHANNEL)
+    if not url:
+        return None
+    if url == 'local':
+        return PubSubClientManager(local_pubsub, channel=channel)
+    if url.startswith('sqlite:///'):
+        return PubSubClientManager(SQLitePubSub(url[len('sqlite:///'):]), channel=channel)
+    if url.startswith('kafka://'):
+        return socketio.KafkaManager(url, channel=channel)
+    raise ValueError(f"Unknown SOCKETIO_MESSAGE_QUEUE: {url}")
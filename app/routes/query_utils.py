@@ -0,0 +1,247 @@
+from collections import defaultdict
+from datetime import datetime
+from app import db
+from app.models import Customer, Menu, Order, OrderHeader, Ratings, VendorRatingSummary
+from app.routes.pagination_utils import PaginationError, decode_cursor, encode_cursor
+
+# Keys of a /vendors entry, and the subset that are plain Vendor columns
+VENDOR_FIELDS = ("VendorID", "VendorName", "Location", "Phone", "Email", "Address", "avg_rating", "Reviews", "Menu")
+VENDOR_COLUMNS = ("VendorID", "VendorName", "Location", "Phone", "Email", "Address")
+
+
+def load_vendor_summaries(vendors, fields=VENDOR_FIELDS):
+    """Build the /vendors JSON shape for ``vendors`` with a fixed number of queries.
+
+    Average ratings come from VendorRatingSummary, reviews are fetched together with
+    the reviewer's name in one join and menus in one IN query, so the query count does
+    not grow with the number of vendors. Only the queries needed for ``fields`` run.
+    """
+    vendor_ids = [vendor.VendorID for vendor in vendors]
+    if not vendor_ids:
+        return []
+
+    avg_ratings = {}
+    if "avg_rating" in fields:
+        avg_ratings = dict(
+            db.session.query(VendorRatingSummary.VendorID, VendorRatingSummary.AvgRating)
+            .filter(VendorRatingSummary.VendorID.in_(vendor_ids))
+            .all()
+        )
+
+    reviews = defaultdict(list)
+    if "Reviews" in fields:
+        review_rows = (
+            db.session.query(Ratings.VendorID, Customer.CustomerName, Ratings.Stars, Ratings.Description)
+            .join(Customer, Ratings.CustomerID == Customer.CustomerID)
+            .filter(Ratings.VendorID.in_(vendor_ids))
+            .order_by(Ratings.RatingID)
+        )
+        for row in review_rows:
+            reviews[row.VendorID].append({
+                "CustomerName": row.CustomerName,
+                "Stars": row.Stars,
+                "Description": row.Description
+            })
+
+    menus = defaultdict(list)
+    if "Menu" in fields:
+        menu_rows = (
+            db.session.query(Menu.VendorID, Menu.MenuID, Menu.FoodItem, Menu.Price)
+            .filter(Menu.VendorID.in_(vendor_ids))
+            .order_by(Menu.MenuID)
+        )
+        for row in menu_rows:
+            menus[row.VendorID].append({"MenuID": row.MenuID, "FoodItem": row.FoodItem, "Price": str(row.Price)})
+
+    result = []
+    for vendor in vendors:
+        entry = {name: getattr(vendor, name) for name in VENDOR_COLUMNS if name in fields}
+        if "avg_rating" in fields:
+            avg_rating = avg_ratings.get(vendor.VendorID)
+            entry["avg_rating"] = round(avg_rating, 2) if avg_rating else None
+        if "Reviews" in fields:
+            entry["Reviews"] = reviews[vendor.VendorID]
+        if "Menu" in fields:
+            entry["Menu"] = menus[vendor.VendorID]
+        result.append(entry)
+    return result
+
+
+# Keys of an order entry and the column each one is read from
+ORDER_COLUMNS = {
+    "OrderID": Order.OrderID,
+    "MenuItem": Menu.FoodItem,
+    "Quantity": Order.Quantity,
+    "TotalPrice": Order.TotalPrice,
+    "OrderStatus": Order.OrderStatus,
+    "OrderDate": Order.OrderDate,
+    "CustomerName": Customer.CustomerName,
+    "CustomerLocation": Customer.Location,
+}
+
+
+def _format_order_value(name, value):
+    if name == "TotalPrice":
+        return str(value)
+    if name == "OrderDate":
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+
+def parse_order_cursor(cursor):
+    """Turn an ``[OrderDate, OrderID]`` cursor into typed values, or None for the first page."""
+    if cursor is None:
+        return None
+    try:
+        return datetime.fromisoformat(cursor[0]), int(cursor[1])
+    except (IndexError, TypeError, ValueError):
+        raise PaginationError("Invalid cursor.")
+
+
+def build_order_query(criteria, fields, cursor=None):
+    """Select the columns behind ``fields`` for orders matching ``criteria``, newest first.
+
+    Menu/Customer are joined only when one of their columns is requested. ``cursor`` is an
+    ``[OrderDate, OrderID]`` keyset position; only older orders are returned.
+    """
+    columns = [Order.OrderID.label("_order_id"), Order.OrderDate.label("_order_date")]
+    columns += [ORDER_COLUMNS[name].label(name) for name in fields]
+    query = db.session.query(*columns)
+    if "MenuItem" in fields:
+        query = query.join(Menu, Order.MenuID == Menu.MenuID)
+    if "CustomerName" in fields or "CustomerLocation" in fields:
+        query = query.join(Customer, Order.CustomerID == Customer.CustomerID)
+    query = query.filter(*criteria)
+
+    if cursor is not None:
+        after_date, after_id = parse_order_cursor(cursor)
+        query = query.filter(db.or_(
+            Order.OrderDate < after_date,
+            db.and_(Order.OrderDate == after_date, Order.OrderID < after_id)
+        ))
+    return query.order_by(Order.OrderDate.desc(), Order.OrderID.desc())
+
+
+def find_order(criteria, fields):
+    """Return the single order row matching ``criteria`` with the columns behind ``fields``, or None."""
+    return build_order_query(criteria, fields).first()
+
+
+def serialize_order(row, fields):
+    return {name: _format_order_value(name, getattr(row, name)) for name in fields}
+
+
+def query_order_page(criteria, fields, limit, cursor=None):
+    """Return ``(orders, next_cursor)`` for one page of orders matching ``criteria``."""
+    rows = build_order_query(criteria, fields, cursor).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1]._order_date.isoformat(), rows[-1]._order_id])
+    return [serialize_order(row, fields) for row in rows], next_cursor
+
+
+def iter_orders(criteria, fields, cursor=None, batch_size=500):
+    """Yield every matching order while holding at most ``batch_size`` rows in memory."""
+    for row in build_order_query(criteria, fields, cursor).yield_per(batch_size):
+        yield serialize_order(row, fields)
+
+
+# Keys of a whole-order entry (an OrderHeader with its lines). The totals and the status are
+# aggregated over the lines in SQL; an order whose lines disagree on status is "Mixed"
+# (typed as a plain string, since "Mixed" is not one of the OrderStatus enum values).
+_LINE_STATUS = db.type_coerce(db.case(
+    (db.func.min(Order.OrderStatus) == db.func.max(Order.OrderStatus), db.func.min(Order.OrderStatus)),
+    else_=db.literal("Mixed")
+), db.String)
+ORDER_GROUP_COLUMNS = {
+    "OrderHeaderID": OrderHeader.OrderHeaderID,
+    "OrderDate": OrderHeader.OrderDate,
+    "OrderStatus": _LINE_STATUS,
+    "ItemCount": db.func.count(Order.OrderID),
+    "Quantity": db.func.sum(Order.Quantity),
+    "TotalPrice": db.func.sum(Order.TotalPrice),
+    "CustomerName": Customer.CustomerName,
+    "CustomerLocation": Customer.Location,
+}
+_AGGREGATE_FIELDS = ("OrderStatus", "ItemCount", "Quantity", "TotalPrice")
+ORDER_LINE_FIELDS = ("OrderID", "MenuItem", "Quantity", "TotalPrice", "OrderStatus")
+
+
+def build_order_group_query(criteria, fields, cursor=None):
+    """Select one row per OrderHeader matching ``criteria`` (OrderHeader columns), newest first.
+
+    Lines are joined and grouped only when an aggregate is requested, Customer only for its
+    columns. ``cursor`` is an ``[OrderDate, OrderHeaderID]`` keyset position.
+    """
+    columns = [OrderHeader.OrderHeaderID.label("_order_id"), OrderHeader.OrderDate.label("_order_date")]
+    columns += [ORDER_GROUP_COLUMNS[name].label(name) for name in fields if name in ORDER_GROUP_COLUMNS]
+    query = db.session.query(*columns)
+    group_by = [OrderHeader.OrderHeaderID, OrderHeader.OrderDate]
+    if "CustomerName" in fields or "CustomerLocation" in fields:
+        query = query.join(Customer, OrderHeader.CustomerID == Customer.CustomerID)
+        group_by += [Customer.CustomerName, Customer.Location]
+    if any(name in fields for name in _AGGREGATE_FIELDS):
+        query = query.join(Order, Order.OrderHeaderID == OrderHeader.OrderHeaderID).group_by(*group_by)
+    query = query.filter(*criteria)
+
+    if cursor is not None:
+        after_date, after_id = parse_order_cursor(cursor)
+        query = query.filter(db.or_(
+            OrderHeader.OrderDate < after_date,
+            db.and_(OrderHeader.OrderDate == after_date, OrderHeader.OrderHeaderID < after_id)
+        ))
+    return query.order_by(OrderHeader.OrderDate.desc(), OrderHeader.OrderHeaderID.desc())
+
+
+def load_order_lines(header_ids):
+    """Map each OrderHeaderID to its lines (with the menu item name) in one query."""
+    lines = defaultdict(list)
+    if not header_ids:
+        return lines
+    rows = (
+        db.session.query(Order.OrderHeaderID, Order.OrderID, Menu.FoodItem.label("MenuItem"),
+                         Order.Quantity, Order.TotalPrice, Order.OrderStatus)
+        .join(Menu, Order.MenuID == Menu.MenuID)
+        .filter(Order.OrderHeaderID.in_(header_ids))
+        .order_by(Order.OrderID)
+    )
+    for row in rows:
+        lines[row.OrderHeaderID].append(serialize_order(row, ORDER_LINE_FIELDS))
+    return lines
+
+
+def serialize_order_groups(rows, fields):
+    lines = load_order_lines([row._order_id for row in rows]) if "Items" in fields else {}
+    result = []
+    for row in rows:
+        entry = {}
+        for name in fields:
+            if name == "Items":
+                entry["Items"] = lines[row._order_id]
+            elif name == "Quantity":
+                entry["Quantity"] = int(row.Quantity)
+            else:
+                entry[name] = _format_order_value(name, getattr(row, name))
+        result.append(entry)
+    return result
+
+
+def query_order_group_page(criteria, fields, limit, cursor=None):
+    """Return ``(orders, next_cursor)`` for one page of whole orders: two queries at most."""
+    rows = build_order_group_query(criteria, fields, cursor).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1]._order_date.isoformat(), rows[-1]._order_id])
+    return serialize_order_groups(rows, fields), next_cursor
+
+
+def iter_order_groups(criteria, fields, cursor=None, batch_size=500):
+    """Yield every matching whole order, one keyset page of ``batch_size`` orders at a time."""
+    while True:
+        orders, cursor = query_order_group_page(criteria, fields, batch_size, cursor)
+        yield from orders
+        if cursor is None:
+            return
+        cursor = decode_cursor(cursor)
@@ -0,0 +1,105 @@
+from collections import defaultdict
+import logging
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import case, event, func, inspect, insert, select, update
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Ratings, VendorRatingSummary
+
+logger = logging.getLogger(__name__)
+
+
+def _average(count, total):
+    return case((count > 0, total * 1.0 / count), else_=None)
+
+
+def _rebuild_vendor(connection, vendor_id):
+    """Recompute one vendor's aggregate from Ratings (used when its summary row is missing)."""
+    count, total = connection.execute(
+        select(func.count(Ratings.RatingID), func.coalesce(func.sum(Ratings.Stars), 0))
+        .where(Ratings.VendorID == vendor_id)
+    ).one()
+    connection.execute(insert(VendorRatingSummary).values(
+        VendorID=vendor_id,
+        RatingCount=count,
+        RatingSum=total,
+        AvgRating=round(total / count, 2) if count else None
+    ))
+
+
+def apply_rating_delta(connection, vendor_id, count_delta, sum_delta):
+    """Adjust a vendor's aggregate in place with a single UPDATE."""
+    new_count = VendorRatingSummary.RatingCount + count_delta
+    new_sum = VendorRatingSummary.RatingSum + sum_delta
+    # AvgRating goes first: MySQL evaluates SET assignments left to right on the updated row
+    result = connection.execute(
+        update(VendorRatingSummary)
+        .where(VendorRatingSummary.VendorID == vendor_id)
+        .ordered_values(
+            (VendorRatingSummary.AvgRating, _average(new_count, new_sum)),
+            (VendorRatingSummary.RatingCount, new_count),
+            (VendorRatingSummary.RatingSum, new_sum),
+        )
+    )
+    if result.rowcount == 0:
+        _rebuild_vendor(connection, vendor_id)
+
+
+def _collect_deltas(session, flush_context):
+    deltas = defaultdict(lambda: [0, 0])
+    for obj in session.new:
+        if isinstance(obj, Ratings):
+            deltas[obj.VendorID][0] += 1
+            deltas[obj.VendorID][1] += int(obj.Stars)
+    for obj in session.deleted:
+        if isinstance(obj, Ratings):
+            deltas[obj.VendorID][0] -= 1
+            deltas[obj.VendorID][1] -= int(obj.Stars)
+    for obj in session.dirty:
+        if isinstance(obj, Ratings):
+            history = inspect(obj).attrs.Stars.history
+            if history.deleted and history.added:
+                deltas[obj.VendorID][1] += int(history.added[0]) - int(history.deleted[0])
+    if not deltas:
+        return
+
+    connection = session.connection()
+    for vendor_id, (count_delta, sum_delta) in deltas.items():
+        apply_rating_delta(connection, vendor_id, count_delta, sum_delta)
+
+
+def register_rating_hooks():
+    """Keep VendorRatingSummary in the same transaction as every Ratings write."""
+    if not event.contains(Session, "after_flush", _collect_deltas):
+        event.listen(Session, "after_flush", _collect_deltas)
+
+
+def rebuild_rating_summaries():
+    """Backfill VendorRatingSummary from a full aggregation over Ratings."""
+    rows = (
+        db.session.query(Ratings.VendorID, func.count(Ratings.RatingID), func.sum(Ratings.Stars))
+        .group_by(Ratings.VendorID)
+        .all()
+    )
+    db.session.query(VendorRatingSummary).delete()
+    db.session.bulk_insert_mappings(VendorRatingSummary, [
+        {
+            "VendorID": vendor_id,
+            "RatingCount": count,
+            "RatingSum": total,
+            "AvgRating": round(total / count, 2)
+        }
+        for vendor_id, count, total in rows
+    ])
+    db.session.commit()
+    logger.info("Rebuilt rating aggregates for %s vendor(s)", len(rows))
+    return len(rows)
+
+
+@click.command("rebuild-ratings")
+@with_appcontext
+def rebuild_ratings_command():
+    """Rebuild the per-vendor rating aggregates from the Ratings table."""
+    count = rebuild_rating_summaries()
+    click.echo(f"Rebuilt rating aggregates for {count} vendor(s).")
@@ -0,0 +1,224 @@
+from collections import Counter, defaultdict
+import logging
+import math
+import re
+import threading
+import time
+from app import db
+from app.models import Menu, Vendor
+from app.routes.invalidation_utils import bus
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("name", "location", "food")
+
+
+def normalize(text):
+    return re.sub(r"\s+", " ", (text or "").lower()).strip()
+
+
+def trigrams(text):
+    """Trigrams of ``text`` padded per word, pg_trgm style ("  b", " bi", "bir", ...)."""
+    grams = set()
+    for word in normalize(text).split(" "):
+        if word:
+            padded = f"  {word} "
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def inner_trigrams(text):
+    """Unpadded trigrams, i.e. the ones any value containing ``text`` must also have."""
+    return {word[i:i + 3] for word in normalize(text).split(" ") for i in range(len(word) - 2)}
+
+
+def _entry(text):
+    text = normalize(text)
+    return text, trigrams(text), [trigrams(word) for word in text.split(" ") if word]
+
+
+def _similarity(query_grams, grams):
+    shared = len(query_grams & grams)
+    return shared / (len(query_grams) + len(grams) - shared) if shared else 0.0
+
+
+def _score(query, query_grams, entry):
+    """Rank one field value against the query; 0 means no match."""
+    text, text_grams, word_grams = entry
+    if text == query:
+        return 4.0
+    if text.startswith(query):
+        return 3.0
+    if any(word.startswith(query) for word in text.split(" ")):
+        return 2.5
+    if query in text:
+        return 2.0
+    # Fuzzy: best trigram similarity against the whole value or any single word in it
+    return max([_similarity(query_grams, text_grams)] + [_similarity(query_grams, grams) for grams in word_grams])
+
+
+class SearchIndex:
+    """In-memory trigram index over vendor names, locations and menu food items.
+
+    Postings map each trigram to the vendors whose field value contains it, so a query
+    only scores vendors that share enough trigrams with it to match at all. Exact, prefix and
+    substring matches (the old ILIKE semantics) rank above fuzzy matches, which need a
+    trigram similarity of at least ``fuzzy_threshold``.
+    """
+
+    def __init__(self, fuzzy_threshold=0.3, max_age_seconds=300):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.RLock()
+        self._docs = {}  # vendor_id -> {field: [(text, trigrams, per-word trigrams), ...]}
+        self._postings = {field: defaultdict(set) for field in FIELDS}
+        self._stale = set()
+        self._built_at = None
+
+    # -- maintenance -------------------------------------------------------
+
+    def _remove(self, vendor_id):
+        doc = self._docs.pop(vendor_id, None)
+        if doc is None:
+            return
+        for field, values in doc.items():
+            postings = self._postings[field]
+            for _, grams, _ in values:
+                for gram in grams:
+                    vendors = postings.get(gram)
+                    if vendors is not None:
+                        vendors.discard(vendor_id)
+                        if not vendors:
+                            del postings[gram]
+
+    def _add(self, vendor_id, name, location, food_items):
+        doc = {
+            "name": [_entry(name)],
+            "location": [_entry(location)],
+            "food": [_entry(food) for food in food_items],
+        }
+        self._docs[vendor_id] = doc
+        for field, values in doc.items():
+            for _, grams, _ in values:
+                for gram in grams:
+                    self._postings[field][gram].add(vendor_id)
+
+    def put_vendor(self, vendor_id, name, location, food_items=()):
+        with self._lock:
+            self._remove(vendor_id)
+            self._add(vendor_id, name, location, food_items)
+
+    def remove_vendor(self, vendor_id):
+        with self._lock:
+            self._remove(vendor_id)
+
+    def mark_stale(self, vendor_id):
+        """Reload ``vendor_id`` from the database before the next search."""
+        with self._lock:
+            self._stale.add(vendor_id)
+
+    def _load(self, vendor_ids=None):
+        vendors = db.session.query(Vendor.VendorID, Vendor.VendorName, Vendor.Location)
+        menus = db.session.query(Menu.VendorID, Menu.FoodItem)
+        if vendor_ids is not None:
+            vendors = vendors.filter(Vendor.VendorID.in_(vendor_ids))
+            menus = menus.filter(Menu.VendorID.in_(vendor_ids))
+        food = defaultdict(list)
+        for vendor_id, food_item in menus:
+            food[vendor_id].append(food_item)
+        return [(row.VendorID, row.VendorName, row.Location, food[row.VendorID]) for row in vendors]
+
+    def rebuild(self):
+        """Rebuild the whole index from the Vendor and Menu tables."""
+        start_time = time.time()
+        rows = self._load()
+        with self._lock:
+            self._docs.clear()
+            self._postings = {field: defaultdict(set) for field in FIELDS}
+            self._stale.clear()
+            for row in rows:
+                self._add(*row)
+            self._built_at = time.monotonic()
+        logger.info("Search index rebuilt with %s vendor(s) in %.3fs", len(rows), time.time() - start_time)
+
+    def refresh(self):
+        """Rebuild when the index is missing or older than max_age_seconds, else reload stale vendors."""
+        with self._lock:
+            expired = self._built_at is None or time.monotonic() - self._built_at > self.max_age_seconds
+            stale, self._stale = self._stale, set()
+        if expired:
+            self.rebuild()
+            return
+        if stale:
+            rows = self._load(stale)
+            with self._lock:
+                for vendor_id in stale:
+                    self._remove(vendor_id)
+                for row in rows:
+                    self._add(*row)
+
+    # -- queries -----------------------------------------------------------
+
+    def search(self, field, query, fuzzy=True):
+        """Return ``{vendor_id: score}`` for vendors whose ``field`` matches ``query``."""
+        query = normalize(query)
+        if not query:
+            return {}
+        query_grams = trigrams(query)
+        with self._lock:
+            postings = self._postings[field]
+            if len(query) < 3:
+                # Too short to be selective; scan the field values directly
+                candidates = self._docs.keys()
+            else:
+                # A substring match needs every inner trigram and a fuzzy match needs at least
+                # fuzzy_threshold of the query's trigrams, so rarer overlaps can be skipped
+                required = len(inner_trigrams(query))
+                if fuzzy:
+                    required = min(required, math.ceil(self.fuzzy_threshold * len(query_grams)))
+                overlap = Counter()
+                for gram in query_grams:
+                    overlap.update(postings.get(gram, ()))
+                candidates = [vendor_id for vendor_id, shared in overlap.items() if shared >= required]
+            scores = {}
+            for vendor_id in candidates:
+                best = max(
+                    (_score(query, query_grams, entry) for entry in self._docs[vendor_id][field]),
+                    default=0.0
+                )
+                if best >= 2.0 or (fuzzy and best >= self.fuzzy_threshold):
+                    scores[vendor_id] = best
+        return scores
+
+
+search_index = SearchIndex()
+
+
+@bus.subscribe
+def reindex_vendor(event):
+    """Queue a vendor for re-indexing after a committed vendor or menu write."""
+    if event.kind in ("vendor", "menu"):
+        search_index.mark_stale(event.vendor_id)
+
+
+def init_search(app):
+    search_index.fuzzy_threshold = app.config.get("SEARCH_FUZZY_THRESHOLD", 0.3)
+    search_index.max_age_seconds = app.config.get("SEARCH_INDEX_MAX_AGE_SECONDS", 300)
+
+
+def search_vendors(location=None, vendor_name=None, food_item=None, fuzzy=True):
+    """Combine per-field matches into ``[(vendor_id, score)]`` best first.
+
+    Every given filter must match, like the ANDed ILIKE filters it replaces.
+    """
+    search_index.refresh()
+    combined = None
+    for field, query in (("name", vendor_name), ("location", location), ("food", food_item)):
+        if not query:
+            continue
+        scores = search_index.search(field, query, fuzzy=fuzzy)
+        if combined is None:
+            combined = scores
+        else:
+            combined = {vendor_id: combined[vendor_id] + score for vendor_id, score in scores.items() if vendor_id in combined}
+    return sorted((combined or {}).items(), key=lambda item: (-item[1], item[0]))
@@ -0,0 +1,45 @@
+import json
+from flask import Response, current_app, request, stream_with_context
+
+
+def streaming_requested():
+    """True for ``?stream=1``, ``?format=ndjson`` or an ``Accept: application/x-ndjson`` request."""
+    return (request.args.get("stream") in ("1", "true")
+            or request.args.get("format") == "ndjson"
+            or request.accept_mimetypes.best == "application/x-ndjson")
+
+
+def _dumps(item):
+    return json.dumps(item, default=str, separators=(",", ":"))
+
+
+def iter_json_array(items, envelope_key=None):
+    """Yield a JSON array (optionally wrapped as ``{envelope_key: [...]}``) one element at a time."""
+    yield '{"%s":[' % envelope_key if envelope_key else "["
+    first = True
+    for item in items:
+        yield _dumps(item) if first else "," + _dumps(item)
+        first = False
+    yield "]}" if envelope_key else "]"
+
+
+def iter_ndjson(items):
+    for item in items:
+        yield _dumps(item) + "\n"
+
+
+def stream_json(items, envelope_key=None):
+    """Stream ``items`` as a JSON array, or as NDJSON when the client asked for it.
+
+    ``items`` should be a generator backed by a ``yield_per`` query or a batched loader so
+    that only one batch of rows is held in memory while the response is written.
+    """
+    if request.args.get("format") == "ndjson" or request.accept_mimetypes.best == "application/x-ndjson":
+        body, mimetype = iter_ndjson(items), "application/x-ndjson"
+    else:
+        body, mimetype = iter_json_array(items, envelope_key), "application/json"
+    return Response(stream_with_context(body), mimetype=mimetype)
+
+
+def stream_batch_size():
+    return current_app.config.get("STREAM_BATCH_SIZE", 500)
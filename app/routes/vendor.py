@@ -79,10 +79,23 @@ def add_menu_item():
 from flask import Blueprint, request, jsonify
 from flask_login import current_user, login_required
 from app import db
-from app.models import Menu, Vendor
+from app.models import Menu, OrderHeader, Vendor
+from app.routes.cache_utils import cache
+from app.routes.invalidation_utils import bus
+from app.routes.identity_utils import current_vendor
+from app.routes.outbox_utils import record_event
+from app.routes.pagination_utils import PaginationError, field_args, page_args, page_headers
+from app.routes.query_utils import (find_order, iter_order_groups, iter_orders, parse_order_cursor,
+                                    query_order_group_page, query_order_page)
+from app.routes.stream_utils import stream_batch_size, stream_json, streaming_requested
 
 vendor_bp = Blueprint('vendor', __name__)
 
+VENDOR_ORDER_FIELDS = ("OrderID", "MenuItem", "Quantity", "TotalPrice", "OrderStatus", "OrderDate",
+                       "CustomerName", "CustomerLocation")
+VENDOR_ORDER_GROUP_FIELDS = ("OrderHeaderID", "OrderDate", "OrderStatus", "ItemCount", "Quantity", "TotalPrice",
+                             "CustomerName", "CustomerLocation", "Items")
+
 @vendor_bp.route('/menu', methods=['GET'])
 #@login_required
 def get_menu_items():
@@ -96,15 +109,25 @@ def get_menu_items():
     if not vendor:
         return jsonify({"error": "Vendor not found"}), 404
 
-    # Fetch menu items
-    menu_items = Menu.query.filter_by(VendorID=vendor.VendorID).all()
-    menu_list = [
-        {"MenuID": item.MenuID, "FoodItem": item.FoodItem, "Price": str(item.Price), "Description": item.Description}
-        for item in menu_items
-    ]
+    # Fetch menu items; invalidate_menu drops the entry whenever this vendor's menu changes
+    cache_key = f"menu_{vendor.VendorID}"
+    menu_list = cache.get(cache_key)
+    if menu_list is None:
+        menu_items = Menu.query.filter_by(VendorID=vendor.VendorID).all()
+        menu_list = [
+            {"MenuID": item.MenuID, "FoodItem": item.FoodItem, "Price": str(item.Price), "Description": item.Description}
+            for item in menu_items
+        ]
+        cache.set(cache_key, menu_list)
 
     return jsonify({"menu": menu_list}), 200
 
+@bus.subscribe
+def invalidate_menu(event):
+    """Drop the cached menu of a vendor after a committed menu write."""
+    if event.kind == "menu":
+        cache.delete(f"menu_{event.vendor_id}")
+
 @vendor_bp.route('/menu', methods=['POST'])
 @login_required
 def add_menu_item():
@@ -112,7 +135,7 @@ def add_menu_item():
     if current_user.Role != 'Vendor':
         return jsonify({"error": "Access denied. Only vendors can add menu items."}), 403
 
-    vendor = Vendor.query.filter_by(UserID=current_user.UserID).first()
+    vendor = current_vendor()
     if not vendor:
         return jsonify({"error": "Vendor not found"}), 404
 
@@ -142,7 +165,7 @@ def update_menu_item(menu_id):
     if current_user.Role != 'Vendor':
         return jsonify({"error": "Access denied. Only vendors can update menu items."}), 403
 
-    vendor = Vendor.query.filter_by(UserID=current_user.UserID).first()
+    vendor = current_vendor()
     if not vendor:
         return jsonify({"error": "Vendor not found"}), 404
 
@@ -162,52 +185,33 @@ def update_menu_item(menu_id):
 @vendor_bp.route('/orders', methods=['GET'])
 @login_required
 def get_vendor_orders():
-    """Retrieve all orders for the vendor."""
+    """Retrieve the vendor's orders, newest first, one page at a time (or streamed with ?stream=1)."""
     if current_user.Role != 'Vendor':
         return jsonify({"error": "Access denied. Only vendors can view orders."}), 403
 
-    vendor = Vendor.query.filter_by(UserID=current_user.UserID).first()
+    vendor = current_vendor()
     if not vendor:
         return jsonify({"error": "Vendor not found"}), 404
 
-    # Fetch orders with customer details
-    orders = db.session.query(Order, Customer).join(Customer, Order.CustomerID == Customer.CustomerID).filter(
-        Order.VendorID == vendor.VendorID).order_by(Order.OrderDate.desc()).all()
-
-    order_list = [
-        {
-            "OrderID": o.Order.OrderID,
-            "MenuItem": o.Order.menu.FoodItem,
-            "Quantity": o.Order.Quantity,
-            "TotalPrice": str(o.Order.TotalPrice),
-            "OrderStatus": o.Order.OrderStatus,
-            "OrderDate": o.Order.OrderDate.strftime('%Y-%m-%d %H:%M:%S'),
-            "CustomerName": o.Customer.CustomerName,  # Customer's name
-            "CustomerLocation": o.Customer.Location  # Optional, e.g., customer's location
-        }
-        for o in orders
-    ]
-
-    return jsonify({"orders": order_list}), 200
-
-@vendor_bp.route("/chat/rooms", methods=["GET"])
-@login_required
-def get_vendor_chat_rooms():
-    """Fetch chat rooms for the logged-in vendor."""
-    if current_user.Role != "Vendor":
-        return jsonify({"error": "Access denied. Only vendors can access this."}), 403
-
-    # Fetch vendor details
-    vendor = Vendor.query.filter_by(UserID=current_user.UserID).first()
-    if not vendor:
-        return jsonify({"error": "Vendor not found."}), 404
-
-    # Fetch orders and create chat rooms based on customer IDs
-    orders = Order.query.filter_by(VendorID=vendor.VendorID).all()
-    rooms = [f"room_{vendor.VendorID}_{order.CustomerID}" for order in orders]
-
-    return jsonify({"rooms": rooms}), 200
-
+    # Fetch one page of orders with customer details, or stream all of them
+    # ?group=order returns whole orders (header, totals and items) instead of one entry per item
+    grouped = request.args.get("group") == "order"
+    if grouped:
+        criteria, iter_page, query_page = [OrderHeader.VendorID == vendor.VendorID], iter_order_groups, query_order_group_page
+    else:
+        criteria, iter_page, query_page = [Order.VendorID == vendor.VendorID], iter_orders, query_order_page
+    try:
+        limit, cursor = page_args()
+        fields = field_args(VENDOR_ORDER_GROUP_FIELDS if grouped else VENDOR_ORDER_FIELDS)
+        if streaming_requested():
+            parse_order_cursor(cursor)  # reject a bad cursor before the response starts
+            orders = iter_page(criteria, fields, cursor, stream_batch_size())
+            return stream_json(orders, envelope_key="orders")
+        order_list, next_cursor = query_page(criteria, fields, limit, cursor)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({"orders": order_list}), 200, page_headers(next_cursor)
 
 @vendor_bp.route('/orders/<int:order_id>', methods=['PUT'])
 @login_required
@@ -222,19 +226,26 @@ def update_order_status(order_id):
     if new_status not in ['Pending', 'Completed', 'Cancelled']:
         return jsonify({"error": "Invalid order status."}), 400
 
-    order = Order.query.filter_by(OrderID=order_id, VendorID=current_user.vendor.VendorID).first()
+    vendor = current_vendor()
+    if not vendor:
+        return jsonify({"error": "Vendor not found"}), 404
+
+    # One joined select for the order and its customer's name, then a plain UPDATE
+    order = find_order([Order.OrderID == order_id, Order.VendorID == vendor.VendorID],
+                       ("OrderID", "CustomerName"))
     if not order:
         return jsonify({"error": "Order not found or access denied."}), 404
 
-    order.OrderStatus = new_status
-    db.session.commit()
+    db.session.query(Order).filter(Order.OrderID == order_id).update(
+        {Order.OrderStatus: new_status}, synchronize_session=False)
 
-    # Notify the customer
-    socketio.emit('order_status_update', {
+    # Notify the customer through the outbox; only the latest pending status per order is sent
+    record_event('order_status_update', "customers", {
         "OrderID": order.OrderID,
         "NewStatus": new_status,
-        "CustomerName": order.customer.CustomerName
-    }, to="customers")
+        "CustomerName": order.CustomerName
+    }, coalesce_key=f"order_status:{order.OrderID}")
+    db.session.commit()
 
     return jsonify({"message": "Order status updated successfully."}), 200
 
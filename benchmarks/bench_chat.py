@@ -0,0 +1,99 @@
+"""Chat load test: sender lookup, message throughput and fan-out latency at N connections.
+
+    python benchmarks/bench_chat.py --connections 1000 10000 --messages 2000
+
+Connections are Flask-SocketIO test clients paired into room_{VendorID}_{CustomerID}
+rooms; room authorisation is bypassed so no users have to be seeded. Latency is measured
+from publish (the sent_at stamp) to the emit to the room in the consumer worker.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from common import make_app, percentile
+
+
+def bench_lookup(connections, lookups=2000):
+    """Old O(n) scan of the users dict versus the registry's sid -> username map."""
+    from app.routes.chat import ConnectionRegistry
+    users = {f"user{i}": f"sid{i}" for i in range(connections)}
+    registry = ConnectionRegistry()
+    for username, sid in users.items():
+        registry.connect(sid, username)
+    sids = [f"sid{random.randrange(connections)}" for _ in range(lookups)]
+
+    start = time.perf_counter()
+    for sid in sids:
+        found = None
+        for user in users:
+            if users[user] == sid:
+                found = user
+    scan_us = (time.perf_counter() - start) / lookups * 1e6
+
+    start = time.perf_counter()
+    for sid in sids:
+        registry.username(sid)
+    registry_us = (time.perf_counter() - start) / lookups * 1e6
+    return scan_us, registry_us
+
+
+def bench_fanout(app, connections, messages):
+    import app.routes.chat as chat
+    chat.can_join = lambda room: True
+
+    start = time.perf_counter()
+    clients = []
+    for i in range(connections):
+        client = chat.socketio.test_client(app)
+        client.emit("user_join", {"username": f"user{i}", "room": f"room_{i // 2}_{i // 2}"})
+        clients.append(client)
+    connect_s = time.perf_counter() - start
+
+    latencies = []
+    deliver = chat.chat_pipeline.worker.handler
+
+    def timed_deliver(message):
+        deliver(message)
+        latencies.append((time.time() - message["sent_at"]) * 1000)
+    chat.chat_pipeline.worker.handler = timed_deliver
+
+    start = time.perf_counter()
+    for i in range(messages):
+        clients[random.randrange(connections)].emit("new_message", f"message {i}")
+    while len(latencies) < messages and time.perf_counter() - start < 120:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    chat.chat_pipeline.worker.handler = deliver
+
+    for client in clients:
+        client.disconnect()
+    return {
+        "connect_s": round(connect_s, 2),
+        "delivered": len(latencies),
+        "messages_per_s": round(len(latencies) / elapsed, 1),
+        "fanout_p50_ms": round(statistics.median(latencies), 2) if latencies else None,
+        "fanout_p95_ms": round(percentile(latencies, 95), 2) if latencies else None,
+        "fanout_p99_ms": round(percentile(latencies, 99), 2) if latencies else None,
+        "registry_after_disconnect": len(chat.registry),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+
+    app = make_app()
+    for connections in args.connections:
+        scan_us, registry_us = bench_lookup(connections)
+        result = {"connections": connections, "scan_lookup_us": round(scan_us, 2),
+                  "registry_lookup_us": round(registry_us, 3)}
+        result.update(bench_fanout(app, connections, args.messages))
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
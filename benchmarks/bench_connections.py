@@ -0,0 +1,207 @@
+"""How many concurrent chat connections one server process holds, per SOCKETIO_ASYNC_MODE.
+
+Starts run.py in a subprocess for each mode (against a scratch SQLite database), opens
+--connections websocket clients in steps (each completes the Engine.IO and Socket.IO
+handshakes and then answers the server's heartbeats), and after each step records how
+many are still open and how long a plain HTTP request takes next to them.
+Reports the server's OS thread count and RSS alongside, since the threading server
+spends a thread per open websocket and gevent a greenlet.
+
+    python benchmarks/bench_connections.py --modes threading gevent --connections 250 1000 4000
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import latency_summary
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, port):
+    scratch = tempfile.mkdtemp(prefix="caterquest-bench-")
+    env = dict(os.environ, SOCKETIO_ASYNC_MODE=mode, SERVER_PORT=str(port), SERVER_DEBUG="0",
+               DATABASE_URL=f"sqlite:///{scratch}/bench.db")
+    server = subprocess.Popen([sys.executable, "run.py"], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"{mode} server did not start on port {port}")
+
+
+def process_stats(pid):
+    stats = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key == "Threads":
+                stats["server_threads"] = int(value)
+            elif key == "VmRSS":
+                stats["server_rss_mb"] = round(int(value.split()[0]) / 1024, 1)
+    return stats
+
+
+def frame(text):
+    """A masked client text frame."""
+    payload = text.encode()
+    mask = os.urandom(4)
+    header = bytes([0x81])
+    if len(payload) < 126:
+        header += bytes([0x80 | len(payload)])
+    else:
+        header += bytes([0x80 | 126]) + len(payload).to_bytes(2, "big")
+    return header + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+
+async def read_frame(reader):
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = int.from_bytes(await reader.readexactly(2), "big")
+    elif length == 127:
+        length = int.from_bytes(await reader.readexactly(8), "big")
+    return first & 0x0F, await reader.readexactly(length)
+
+
+async def read_packet(reader, prefix):
+    """Next Engine.IO text packet starting with ``prefix``."""
+    while True:
+        opcode, payload = await read_frame(reader)
+        text = payload.decode(errors="replace") if opcode == 1 else ""
+        if text.startswith(prefix):
+            return text
+
+
+class ChatClient:
+    """A bare websocket Socket.IO client: handshake, namespace connect, then heartbeats only."""
+
+    def __init__(self, port):
+        self.port = port
+        self.reader = self.writer = None
+        self.keepalive = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((
+            "GET /socket.io/?EIO=4&transport=websocket HTTP/1.1\r\n"
+            f"Host: 127.0.0.1:{self.port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode())
+        status = await self.reader.readuntil(b"\r\n\r\n")
+        if b" 101 " not in status.split(b"\r\n", 1)[0]:
+            raise ConnectionError(status.split(b"\r\n", 1)[0].decode())
+        await read_packet(self.reader, "0")  # Engine.IO open
+        self.writer.write(frame("40"))  # Socket.IO connect to "/"
+        await read_packet(self.reader, "40")
+        self.keepalive = asyncio.ensure_future(self._answer_pings())
+
+    async def _answer_pings(self):
+        # The server drops a client that misses a heartbeat; the task ends when the socket closes
+        try:
+            while True:
+                await read_packet(self.reader, "2")
+                self.writer.write(frame("3"))
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+
+    @property
+    def is_open(self):
+        return self.keepalive is not None and not self.keepalive.done()
+
+    def close(self):
+        if self.keepalive is not None:
+            self.keepalive.cancel()
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def open_clients(port, count, timeout):
+    clients, latencies, failures = [], [], 0
+
+    async def one():
+        nonlocal failures
+        client = ChatClient(port)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(client.connect(), timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            failures += 1
+            client.close()
+            return
+        latencies.append((time.perf_counter() - start) * 1000)
+        clients.append(client)
+
+    start = time.perf_counter()
+    # Connect in waves so the listen backlog is not the thing being measured
+    for offset in range(0, count, 200):
+        await asyncio.gather(*(one() for _ in range(min(200, count - offset))))
+    return clients, latencies, failures, time.perf_counter() - start
+
+
+async def http_latency(port, timeout):
+    start = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), timeout)
+        writer.write(f"GET /metrics HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nConnection: close\r\n\r\n".encode())
+        status = await asyncio.wait_for(reader.readline(), timeout)
+        writer.close()
+    except (OSError, asyncio.TimeoutError):
+        return None
+    return round((time.perf_counter() - start) * 1000, 2) if b" 200 " in status else None
+
+
+async def bench_mode(mode, steps, timeout):
+    port = free_port()
+    server = start_server(mode, port)
+    held = []
+    try:
+        for target in steps:
+            clients, latencies, failures, elapsed = await open_clients(port, target - len(held), timeout)
+            held += clients
+            await asyncio.sleep(1)
+            result = {"mode": mode, "target": target, "open": sum(client.is_open for client in held), "failed": failures,
+                      "connect": latency_summary(latencies, elapsed),
+                      "http_ms_while_connected": await http_latency(port, timeout)}
+            result.update(process_stats(server.pid))
+            print(json.dumps(result))
+            if failures:
+                break
+    finally:
+        for client in held:
+            client.close()
+        server.kill()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", default=["threading", "gevent"])
+    parser.add_argument("--connections", type=int, nargs="+", default=[250, 1000, 4000])
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds before a connect counts as failed")
+    args = parser.parse_args()
+    for mode in args.modes:
+        asyncio.run(bench_mode(mode, sorted(args.connections), args.timeout))
+
+
+if __name__ == "__main__":
+    main()
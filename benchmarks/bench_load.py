@@ -0,0 +1,183 @@
+"""Load test: latency percentiles and throughput for the main endpoints under concurrency.
+
+Seeds a scratch database (SQLite by default, or any --database-uri the app can use) with
+vendors, menus, ratings, customers and orders, then runs each scenario with --threads
+workers for --duration seconds. Every worker has its own test client logged in as a
+seeded vendor or customer; ``mixed`` runs all the scenarios at once, threads split
+between them. Latency is per request; for chat it is send to receipt of the broadcast
+back on the sender's own socket.
+
+Prints one JSON object per scenario; --output also writes the whole run (seed sizes
+included) as one JSON document, so results can be diffed between commits.
+
+    python benchmarks/bench_load.py --vendors 1000 --orders 20000 --threads 8 --duration 10
+"""
+import argparse
+import json
+import random
+import threading
+import time
+
+from common import (latency_summary, login_client, make_app, seed_customers, seed_orders, seed_ratings,
+                    seed_vendors)
+
+SCENARIOS = ["list_vendors", "vendor_orders", "customer_orders", "place_order", "chat"]
+
+
+class Seeded:
+    """IDs of the seeded rows the workers pick from."""
+
+    def __init__(self, vendors, customers, menus):
+        self.vendors = vendors  # [(UserID, VendorID)]
+        self.customers = customers  # [(UserID, CustomerID)]
+        self.menus = menus  # {VendorID: [MenuID]}
+
+
+def seed(app, args):
+    from app import db
+    from app.models import Menu, Vendor
+    with app.app_context():
+        vendor_ids = seed_vendors(db, args.vendors, menus_per_vendor=args.menus)
+        customers = seed_customers(db, args.customers)
+        customer_ids = [customer_id for _, customer_id in customers]
+        seed_ratings(db, vendor_ids, customer_ids, per_vendor=args.ratings)
+        seed_orders(db, vendor_ids, customer_ids, args.orders)
+        vendors = [tuple(row) for row in db.session.query(Vendor.UserID, Vendor.VendorID)]
+        menus = {}
+        for menu_id, vendor_id in db.session.query(Menu.MenuID, Menu.VendorID):
+            menus.setdefault(vendor_id, []).append(menu_id)
+    return Seeded(vendors, customers, menus)
+
+
+def expect(response, status=200):
+    return response.status_code == status
+
+
+def list_vendors(app, seeded, rng):
+    from common import CITIES
+    client = login_client(app, rng.choice(seeded.customers)[0])
+
+    def op():
+        # Mostly the cached first page, sometimes a filtered search
+        if rng.random() < 0.8:
+            return expect(client.get("/vendors?limit=20"))
+        return expect(client.get(f"/vendors?limit=20&location={rng.choice(CITIES)}"))
+    return op
+
+
+def vendor_orders(app, seeded, rng):
+    client = login_client(app, rng.choice(seeded.vendors)[0])
+    return lambda: expect(client.get("/orders?limit=20"))
+
+
+def customer_orders(app, seeded, rng):
+    client = login_client(app, rng.choice(seeded.customers)[0])
+    return lambda: expect(client.get("/orders/customer?limit=20&group=order"))
+
+
+def place_order(app, seeded, rng):
+    client = login_client(app, rng.choice(seeded.customers)[0])
+
+    def op():
+        vendor_id = rng.choice(seeded.vendors)[1]
+        menu_ids = rng.sample(seeded.menus[vendor_id], min(3, len(seeded.menus[vendor_id])))
+        items = [{"menuID": menu_id, "quantity": rng.randint(1, 4)} for menu_id in menu_ids]
+        return expect(client.post("/orders", json={"vendorID": vendor_id, "items": items}), 201)
+    return op
+
+
+def chat(app, seeded, rng, timeout=5.0):
+    from app import socketio
+    user_id, customer_id = rng.choice(seeded.customers)
+    room = f"room_{rng.choice(seeded.vendors)[1]}_{customer_id}"
+    socket = socketio.test_client(app, flask_test_client=login_client(app, user_id))
+    socket.emit("user_join", {"username": f"customer{user_id}", "room": room})
+    socket.get_received()
+
+    def op():
+        socket.emit("new_message", {"room": room, "message": "load test"})
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if any(packet["name"] == "chat" for packet in socket.get_received()):
+                return True
+            time.sleep(0.0005)
+        return False
+    return op
+
+
+def run(app, seeded, scenarios, threads, duration, seed_value):
+    """Run ``threads`` workers (assigned to ``scenarios`` round-robin) for ``duration`` seconds."""
+    samples = {name: [] for name in scenarios}
+    errors = {name: 0 for name in scenarios}
+    lock = threading.Lock()
+    stop_at = []
+    # Workers build their clients first; the clock starts once every one of them is ready
+    ready = threading.Barrier(threads + 1, action=lambda: stop_at.append(time.perf_counter() + duration))
+
+    def worker(index):
+        name = scenarios[index % len(scenarios)]
+        rng = random.Random(seed_value + index)
+        op = globals()[name](app, seeded, rng)
+        local, failed = [], 0
+        ready.wait()
+        while time.perf_counter() < stop_at[0]:
+            start = time.perf_counter()
+            try:
+                ok = op()
+            except Exception:
+                ok = False
+            if ok:
+                local.append((time.perf_counter() - start) * 1000)
+            else:
+                failed += 1
+        with lock:
+            samples[name] += local
+            errors[name] += failed
+
+    workers = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    ready.wait()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - (stop_at[0] - duration)
+    return {name: dict(latency_summary(samples[name], elapsed), errors=errors[name]) for name in scenarios}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-uri", help="defaults to a scratch SQLite file")
+    parser.add_argument("--vendors", type=int, default=500)
+    parser.add_argument("--menus", type=int, default=5, help="menu items per vendor")
+    parser.add_argument("--ratings", type=int, default=5, help="ratings per vendor")
+    parser.add_argument("--customers", type=int, default=500)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per scenario")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS + ["mixed"], default=SCENARIOS + ["mixed"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write the full report to this JSON file")
+    args = parser.parse_args()
+
+    app = make_app(args.database_uri)
+    start = time.perf_counter()
+    seeded = seed(app, args)
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "database_uri")},
+        "database": app.config["SQLALCHEMY_DATABASE_URI"].split(":", 1)[0],
+        "seed_s": round(time.perf_counter() - start, 2),
+        "results": [],
+    }
+    for scenario in args.scenarios:
+        names = SCENARIOS if scenario == "mixed" else [scenario]
+        threads = max(args.threads, len(names))  # at least one worker per endpoint in the mix
+        for name, summary in run(app, seeded, names, threads, args.duration, args.seed).items():
+            report["results"].append(dict({"scenario": scenario, "endpoint": name}, **summary))
+            print(json.dumps(report["results"][-1]))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Count the SQL statements behind the order history endpoints as the history grows.
+
+Every variant (flat or ?group=order, one page or the full stream) should issue the same
+number of statements for 10 orders as for 1,000. With --check the script exits non-zero
+when a count grows with the history size, so it can guard against N+1 regressions.
+
+    python benchmarks/bench_order_queries.py --sizes 10 1000 --check
+"""
+import argparse
+import json
+import sys
+import threading
+
+from sqlalchemy import event, insert
+
+from common import login_client, make_app, seed_customers, seed_vendors
+
+VARIANTS = {
+    "customer_page": "/orders/customer?limit=200",
+    "customer_stream": "/orders/customer?stream=1",
+    "customer_grouped_page": "/orders/customer?group=order&limit=200",
+    "customer_grouped_stream": "/orders/customer?group=order&stream=1",
+    "vendor_page": "/orders?limit=200",
+    "vendor_stream": "/orders?stream=1",
+    "vendor_grouped_page": "/orders?group=order&limit=200",
+    "vendor_grouped_stream": "/orders?group=order&stream=1",
+}
+
+
+def seed_orders(db, vendor_id, customer_id, orders, lines_per_order=2):
+    from app.models import Menu, Order, OrderHeader
+    menu_ids = [row[0] for row in db.session.query(Menu.MenuID).filter_by(VendorID=vendor_id)]
+    for _ in range(orders):
+        header = OrderHeader(VendorID=vendor_id, CustomerID=customer_id)
+        db.session.add(header)
+        db.session.flush()
+        db.session.execute(insert(Order), [
+            {"OrderHeaderID": header.OrderHeaderID, "VendorID": vendor_id, "CustomerID": customer_id,
+             "MenuID": menu_ids[i % len(menu_ids)], "Quantity": 1, "TotalPrice": 100, "OrderStatus": "Pending"}
+            for i in range(lines_per_order)
+        ])
+    db.session.commit()
+
+
+def count_statements(app, client, url):
+    from app import db
+    statements = []
+    thread = threading.get_ident()
+
+    def record(conn, cursor, statement, *args):
+        # The test client runs the request in this thread; skip the outbox dispatcher's polls
+        if threading.get_ident() == thread:
+            statements.append(statement)
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        response = client.get(url)
+        assert response.status_code == 200, response.data
+        response.get_data()  # drain streamed bodies
+    finally:
+        with app.app_context():
+            event.remove(db.engine, "before_cursor_execute", record)
+    return len(statements)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000])
+    parser.add_argument("--check", action="store_true", help="fail if a count grows with the history size")
+    args = parser.parse_args()
+
+    counts = {}
+    for size in args.sizes:
+        app = make_app(STREAM_BATCH_SIZE=max(args.sizes) * 2)
+        with app.app_context():
+            from app import db
+            from app.models import Vendor
+            vendor_id = seed_vendors(db, 1, menus_per_vendor=5)[0]
+            vendor_user_id = db.session.get(Vendor, vendor_id).UserID
+            customer_user_id, customer_id = seed_customers(db, 1)[0]
+            seed_orders(db, vendor_id, customer_id, size)
+
+        clients = {"customer": login_client(app, customer_user_id), "vendor": login_client(app, vendor_user_id)}
+        for name, url in VARIANTS.items():
+            counts.setdefault(name, {})[size] = count_statements(app, clients[name.split("_")[0]], url)
+        print(json.dumps({"orders": size, "statements": {name: counts[name][size] for name in VARIANTS}}))
+
+    grown = [name for name, by_size in counts.items() if len(set(by_size.values())) > 1]
+    if args.check and grown:
+        print(f"Statement count grows with order history: {', '.join(grown)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Order placement throughput against cart size: per-item lookups versus the batched path.
+
+legacy_orders_per_s replays the old place_order body (one Menu query and one ORM add per
+item); bulk_orders_per_s is the current one (one IN query, one executemany INSERT). Both
+run in-process against the same database, and endpoint_orders_per_s drives POST
+/orders through the test client for the full request cost.
+
+    python benchmarks/bench_orders.py --cart-sizes 1 5 20 50 --orders 200
+"""
+import argparse
+import json
+import time
+
+from common import login_client, make_app, seed_customers, seed_vendors
+
+
+def legacy_place(db, Menu, Order, vendor_id, customer_id, items):
+    for item in items:
+        if not Menu.query.filter_by(MenuID=item["menuID"], VendorID=vendor_id).first():
+            raise ValueError(item["menuID"])
+    for item in items:
+        db.session.add(Order(VendorID=vendor_id, CustomerID=customer_id, MenuID=item["menuID"],
+                             Quantity=item["quantity"], TotalPrice=item["price"] * item["quantity"],
+                             OrderStatus="Pending"))
+    db.session.commit()
+
+
+def bulk_place(db, Menu, Order, vendor_id, customer_id, items):
+    from sqlalchemy import insert
+    prices = dict(db.session.query(Menu.MenuID, Menu.Price)
+                  .filter(Menu.VendorID == vendor_id, Menu.MenuID.in_({item["menuID"] for item in items})))
+    db.session.execute(insert(Order), [
+        {"VendorID": vendor_id, "CustomerID": customer_id, "MenuID": item["menuID"], "Quantity": item["quantity"],
+         "TotalPrice": prices[item["menuID"]] * item["quantity"], "OrderStatus": "Pending"}
+        for item in items
+    ])
+    db.session.commit()
+
+
+def rate(fn, orders):
+    start = time.perf_counter()
+    for _ in range(orders):
+        fn()
+    return orders / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cart-sizes", type=int, nargs="+", default=[1, 5, 20, 50])
+    parser.add_argument("--orders", type=int, default=200)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        from app import db
+        from app.models import Menu, Order
+        vendor_id = seed_vendors(db, 1, menus_per_vendor=max(args.cart_sizes))[0]
+        user_id, customer_id = seed_customers(db, 1)[0]
+        menu = [{"menuID": menu_id, "price": float(price)} for menu_id, price in
+                db.session.query(Menu.MenuID, Menu.Price).filter_by(VendorID=vendor_id)]
+
+        client = login_client(app, user_id)
+        for size in args.cart_sizes:
+            items = [dict(menu[i], quantity=2) for i in range(size)]
+            legacy = rate(lambda: legacy_place(db, Menu, Order, vendor_id, customer_id, items), args.orders)
+            bulk = rate(lambda: bulk_place(db, Menu, Order, vendor_id, customer_id, items), args.orders)
+
+            def post():
+                response = client.post("/orders", json={"vendorID": vendor_id, "items": items})
+                assert response.status_code == 201, response.data
+            endpoint = rate(post, args.orders)
+            print(json.dumps({
+                "cart_size": size, "orders": args.orders,
+                "legacy_orders_per_s": round(legacy, 1), "bulk_orders_per_s": round(bulk, 1),
+                "endpoint_orders_per_s": round(endpoint, 1), "endpoint_lines_per_s": round(endpoint * size, 1),
+            }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Compare the trigram search index with the ILIKE path of query_vendors.
+
+ilike_ms/index_ms time the whole query_vendors call (rows included); index_lookup_ms is
+the index lookup alone. Broad queries are dominated by loading the matching rows, so the
+selective query is the one that shows the cost of the full scan.
+
+    python benchmarks/bench_search.py --sizes 10000 100000 --repeat 20
+"""
+import argparse
+import json
+import statistics
+import time
+
+from common import make_app, seed_vendors
+
+QUERIES = [
+    {"vendor_name": "4242"},  # selective: one vendor (the seeded names end in the user ID)
+    {"vendor_name": "spice"},
+    {"vendor_name": "tandor"},  # typo, only the index matches it
+    {"location": "hyderabad"},
+    {"location": "pune", "vendor_name": "kitchen"},
+    {"food_item": "biryani"},
+]
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    report = []
+    for size in args.sizes:
+        app = make_app()
+        with app.app_context():
+            from app import db
+            from app.routes.customer import query_vendors
+            from app.routes.search_utils import search_index, search_vendors
+            seed_vendors(db, size)
+
+            start = time.perf_counter()
+            search_index.rebuild()
+            build_ms = (time.perf_counter() - start) * 1000
+
+            for filters in QUERIES:
+                lookup_ms, _ = timed(lambda: search_vendors(**filters), args.repeat)
+                app.config["SEARCH_BACKEND"] = "ilike"
+                ilike_ms, ilike_rows = timed(lambda: query_vendors.__wrapped__(**filters)[0], args.repeat)
+                app.config["SEARCH_BACKEND"] = "index"
+                index_ms, index_rows = timed(lambda: query_vendors.__wrapped__(**filters)[0], args.repeat)
+                report.append({
+                    "vendors": size, "filters": filters, "index_build_ms": round(build_ms, 1),
+                    "ilike_ms": round(ilike_ms, 2), "ilike_rows": ilike_rows,
+                    "index_ms": round(index_ms, 2), "index_lookup_ms": round(lookup_ms, 2), "index_rows": index_rows,
+                })
+                print(json.dumps(report[-1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Cross-process Socket.IO delivery through SOCKETIO_MESSAGE_QUEUE.
+
+Starts --workers processes, each running the app with its own Socket.IO server and one
+socket joined to the same room. Every worker then emits --messages events to that
+room, the way place_order/update_order_status emit to vendor and customer rooms, and
+counts what its socket receives. With a shared queue every socket must see every
+worker's events; the script exits non-zero if any are missing.
+
+    python benchmarks/bench_socketio_scaleout.py --workers 3 --messages 500
+    python benchmarks/bench_socketio_scaleout.py --queue none   # each worker only sees its own
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+ROOM = "room_1_1"
+
+
+def attach_listener(server, room):
+    """Stand-in for a connected browser: a fake socket in ``room`` whose packets are recorded.
+
+    Flask-SocketIO's test client refuses to run with a message queue, so the socket is
+    registered with the server's client manager directly and its outgoing packets are
+    captured where the server would write them to the transport.
+    """
+    received = []
+    eio_sid = uuid.uuid4().hex
+    server.manager.initialize()
+    server.manager_initialized = True
+    sid = server.manager.connect(eio_sid, "/")
+    server.manager.enter_room(sid, "/", room)
+    send = server._send_eio_packet
+
+    def capture(target, pkt):
+        if target != eio_sid:
+            return send(target, pkt)
+        event, payload = json.loads(pkt.data[1:])  # socket.io EVENT packets are '2[...]'
+        if event == "new_order":
+            received.append(payload)
+    server._send_eio_packet = capture
+    return received
+
+
+def worker(index, queue_url, messages, expected, barrier, results):
+    from common import make_app
+    app = make_app(SOCKETIO_MESSAGE_QUEUE=queue_url)
+    from app import socketio
+
+    received = attach_listener(socketio.server, ROOM)
+    time.sleep(0.5)  # let the queue listener start before anyone publishes
+    barrier.wait()
+
+    start = time.perf_counter()
+    for seq in range(messages):
+        socketio.emit("new_order", {"worker": index, "seq": seq}, to=ROOM)
+    publish_s = time.perf_counter() - start
+
+    deadline = time.monotonic() + 30
+    while len(received) < expected and time.monotonic() < deadline:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    results.put({
+        "worker": index, "received": len(received), "expected": expected,
+        "from_other_workers": sum(1 for event in received if event["worker"] != index),
+        "publish_per_s": round(messages / publish_s, 1), "delivered_per_s": round(len(received) / elapsed, 1),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--queue", default=None,
+                        help='SOCKETIO_MESSAGE_QUEUE URL, or "none"; default: a scratch sqlite:/// file')
+    args = parser.parse_args()
+
+    queue_url = args.queue
+    if queue_url is None:
+        queue_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="caterquest-queue-"), "socketio.db")
+    elif queue_url == "none":
+        queue_url = None
+    expected = args.workers * args.messages if queue_url else args.messages
+
+    ctx = multiprocessing.get_context("spawn")
+    barrier, results = ctx.Barrier(args.workers), ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(i, queue_url, args.messages, expected, barrier, results))
+                 for i in range(args.workers)]
+    for process in processes:
+        process.start()
+    report = [results.get(timeout=120) for _ in processes]
+    for process in processes:
+        process.join()
+
+    print(json.dumps({"queue": queue_url, "workers": sorted(report, key=lambda r: r["worker"])}, indent=2))
+    if any(entry["received"] < entry["expected"] for entry in report):
+        print("Some workers missed events", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Shared helpers for the benchmark scripts: a throwaway SQLite app and data seeding."""
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FOODS = ["Biryani", "Paneer Tikka", "Masala Dosa", "Idli", "Chole Bhature", "Pav Bhaji",
+         "Dal Makhani", "Gulab Jamun", "Veg Thali", "Butter Chicken", "Samosa", "Khichdi"]
+WORDS = ["Spice", "Home", "Kitchen", "Tiffin", "Feast", "Caterers", "Delight", "Rasoi",
+         "Annapurna", "Tandoor", "Bites", "Flavours", "Royal", "Mehfil", "Zaika", "Swad"]
+CITIES = ["Hyderabad", "Secunderabad", "Pune", "Mumbai", "Bengaluru", "Chennai", "Delhi",
+          "Kolkata", "Ahmedabad", "Jaipur", "Lucknow", "Kochi"]
+
+
+def make_app(database_uri=None, **config):
+    """Create the app against a scratch SQLite database (or ``database_uri``) with fresh tables."""
+    import config as app_config
+    if database_uri is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="caterquest-bench-"), "bench.db")
+        database_uri = f"sqlite:///{path}"
+    app_config.Config.SQLALCHEMY_DATABASE_URI = database_uri
+    for key, value in config.items():
+        setattr(app_config.Config, key, value)
+
+    from app import create_app, db
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def seed_vendors(db, vendors, menus_per_vendor=3, seed=42):
+    """Bulk insert ``vendors`` vendors (plus their AuthUser rows and menus) and return their IDs."""
+    from app.models import AuthUser, Menu, Vendor
+    rng = random.Random(seed)
+    start = (db.session.query(db.func.max(AuthUser.UserID)).scalar() or 0) + 1
+    db.session.execute(AuthUser.__table__.insert(), [
+        {"UserID": start + i, "Username": f"vendor{start + i}", "Email": f"vendor{start + i}@example.com",
+         "PasswordHash": "x", "Role": "Vendor"}
+        for i in range(vendors)
+    ])
+    db.session.execute(Vendor.__table__.insert(), [
+        {"UserID": start + i, "VendorName": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {start + i}",
+         "Phone": "9999999999", "Email": f"vendor{start + i}@example.com",
+         "Address": f"{rng.randint(1, 500)} Main Road", "Location": f"{rng.choice(CITIES)} {rng.choice(WORDS)}"}
+        for i in range(vendors)
+    ])
+    vendor_ids = [row[0] for row in db.session.query(Vendor.VendorID).filter(Vendor.UserID >= start)]
+    db.session.execute(Menu.__table__.insert(), [
+        {"VendorID": vendor_id, "FoodItem": rng.choice(FOODS), "Price": rng.randint(50, 500), "Description": ""}
+        for vendor_id in vendor_ids
+        for _ in range(menus_per_vendor)
+    ])
+    db.session.commit()
+    return vendor_ids
+
+
+def seed_customers(db, customers, seed=42):
+    """Bulk insert ``customers`` customers (plus their AuthUser rows) and return ``(UserID, CustomerID)`` pairs."""
+    from app.models import AuthUser, Customer
+    rng = random.Random(seed)
+    start = (db.session.query(db.func.max(AuthUser.UserID)).scalar() or 0) + 1
+    db.session.execute(AuthUser.__table__.insert(), [
+        {"UserID": start + i, "Username": f"customer{start + i}", "Email": f"customer{start + i}@example.com",
+         "PasswordHash": "x", "Role": "Customer"}
+        for i in range(customers)
+    ])
+    db.session.execute(Customer.__table__.insert(), [
+        {"UserID": start + i, "CustomerName": f"Customer {start + i}", "Phone": "8888888888",
+         "Location": rng.choice(CITIES)}
+        for i in range(customers)
+    ])
+    db.session.commit()
+    return [tuple(row) for row in db.session.query(Customer.UserID, Customer.CustomerID).filter(Customer.UserID >= start)]
+
+
+def login_client(app, user_id):
+    """A test client whose session is already logged in as ``user_id`` (skips bcrypt)."""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+        session["_fresh"] = True
+    return client
+
+
+def seed_ratings(db, vendor_ids, customer_ids, per_vendor=5, seed=42):
+    """Bulk insert ``per_vendor`` ratings for each vendor and rebuild the rating summaries."""
+    from app.models import Ratings
+    from app.routes.rating_utils import rebuild_rating_summaries
+    rng = random.Random(seed)
+    db.session.execute(Ratings.__table__.insert(), [
+        {"VendorID": vendor_id, "CustomerID": rng.choice(customer_ids), "Stars": rng.randint(1, 5),
+         "Description": f"{rng.choice(FOODS)} was {rng.choice(['great', 'good', 'okay', 'cold'])}"}
+        for vendor_id in vendor_ids
+        for _ in range(per_vendor)
+    ])
+    db.session.commit()
+    # Core inserts skip the ORM flush hooks that normally keep the summaries in step
+    rebuild_rating_summaries()
+
+
+def seed_orders(db, vendor_ids, customer_ids, orders, items_per_order=3, seed=42):
+    """Bulk insert ``orders`` checkouts (an OrderHeader plus its lines) spread over the last 90 days."""
+    from datetime import datetime, timedelta
+    from app.models import Menu, Order, OrderHeader
+    rng = random.Random(seed)
+    menus = {}
+    for menu_id, vendor_id, price in db.session.query(Menu.MenuID, Menu.VendorID, Menu.Price).filter(
+            Menu.VendorID.in_(vendor_ids)):
+        menus.setdefault(vendor_id, []).append((menu_id, price))
+    start = (db.session.query(db.func.max(OrderHeader.OrderHeaderID)).scalar() or 0) + 1
+    now = datetime.now()
+    headers, lines = [], []
+    for header_id in range(start, start + orders):
+        vendor_id = rng.choice(vendor_ids)
+        customer_id = rng.choice(customer_ids)
+        order_date = now - timedelta(seconds=rng.randint(0, 90 * 24 * 3600))
+        headers.append({"OrderHeaderID": header_id, "VendorID": vendor_id, "CustomerID": customer_id,
+                        "OrderDate": order_date})
+        for menu_id, price in rng.sample(menus[vendor_id], min(items_per_order, len(menus[vendor_id]))):
+            quantity = rng.randint(1, 5)
+            lines.append({"OrderHeaderID": header_id, "VendorID": vendor_id, "CustomerID": customer_id,
+                          "MenuID": menu_id, "OrderDate": order_date, "Quantity": quantity,
+                          "TotalPrice": price * quantity,
+                          "OrderStatus": rng.choice(["Pending", "Completed", "Cancelled"])})
+    db.session.execute(OrderHeader.__table__.insert(), headers)
+    db.session.execute(Order.__table__.insert(), lines)
+    db.session.commit()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def latency_summary(samples_ms, elapsed_s):
+    """p50/p95/p99/max latency in milliseconds and requests per second for one set of samples."""
+    if not samples_ms:
+        return {"requests": 0, "throughput_per_s": 0.0, "p50_ms": None, "p95_ms": None, "p99_ms": None,
+                "max_ms": None}
+    return {
+        "requests": len(samples_ms),
+        "throughput_per_s": round(len(samples_ms) / elapsed_s, 1),
+        "p50_ms": round(percentile(samples_ms, 50), 2),
+        "p95_ms": round(percentile(samples_ms, 95), 2),
+        "p99_ms": round(percentile(samples_ms, 99), 2),
+        "max_ms": round(max(samples_ms), 2),
+    }
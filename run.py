@@ -1,3 +1,12 @@
+from config import get_config
+
+settings = get_config()
+if settings.SOCKETIO_ASYNC_MODE == 'gevent':
+    # Sockets, locks and threads become greenlets, so an idle websocket costs a greenlet
+    # rather than an OS thread; this has to happen before Flask or SQLAlchemy is imported
+    from gevent import monkey
+    monkey.patch_all()
+
 from app import create_app, socketio
 from app import create_app, db
 
@@ -6,4 +15,8 @@ app = create_app()
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()  # Create tables in the database
-    socketio.run(app, host="127.0.0.1", port=5000, debug=True)
+    options = {}
+    if settings.SOCKETIO_ASYNC_MODE == 'threading':
+        # The Werkzeug development server refuses to start without debug unless told otherwise
+        options['allow_unsafe_werkzeug'] = True
+    socketio.run(app, host=settings.SERVER_HOST, port=settings.SERVER_PORT, debug=settings.SERVER_DEBUG, **options)